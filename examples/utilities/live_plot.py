@@ -14,7 +14,7 @@ class LivePlot(object):
             line_color (Optional[dict]): Color of the plot.
         """
         self.outdir = outdir
-        self._last_data = None
+        self.results = gym.monitoring.ResultsReader(outdir)
         self.data_key = data_key
         self.line_color = line_color
 
@@ -26,12 +26,9 @@ class LivePlot(object):
         fig = plt.gcf().canvas.set_window_title('')
 
     def plot(self):
-        results = gym.monitoring.monitor.load_results(self.outdir)
-        data =  results[self.data_key]
-
-        #only update plot if data is different (plot calls are expensive)
-        if data !=  self._last_data:
-            self._last_data = data
+        #only update plot if there are new episodes (plot calls are expensive)
+        if self.results.update():
+            data = getattr(self.results, self.data_key)
             plt.plot(data, color=self.line_color)
 
             # pause so matplotlib will display
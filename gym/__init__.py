@@ -1,5 +1,5 @@
-import distutils.version
 import logging
+import re
 import sys
 
 from gym import error
@@ -8,18 +8,22 @@ from gym.utils import reraise
 
 logger = logging.getLogger(__name__)
 
+def _version_tuple(version):
+    # Leading numeric components only, e.g. '1.11.0rc1' -> (1, 11, 0). This
+    # avoids importing distutils (slow, and going away) at import time.
+    return tuple(int(part) for part in re.findall(r'\d+', version.split('+')[0])[:3])
+
 # Do this before importing any other gym modules, as most of them import some
 # dependencies themselves.
 def sanity_check_dependencies():
     import numpy
-    import requests
     import six
 
-    if distutils.version.LooseVersion(numpy.__version__) < distutils.version.LooseVersion('1.10.4'):
+    if _version_tuple(numpy.__version__) < (1, 10, 4):
         logger.warn("You have 'numpy' version %s installed, but 'gym' requires at least 1.10.4. HINT: upgrade via 'pip install -U numpy'.", numpy.__version__)
 
-    if distutils.version.LooseVersion(requests.__version__) < distutils.version.LooseVersion('2.0'):
-        logger.warn("You have 'requests' version %s installed, but 'gym' requires at least 2.0. HINT: upgrade via 'pip install -U requests'.", requests.__version__)
+    # 'requests' is only needed by the scoreboard, which is imported
+    # lazily, so we check its version in gym.scoreboard.client instead.
 
 # We automatically configure a logger with a simple stderr handler. If
 # you'd rather customize logging yourself, run undo_logger_setup.
@@ -33,6 +37,15 @@ sanity_check_dependencies()
 
 from gym.core import Env, Space
 from gym.envs import make, spec
-from gym.scoreboard.api import upload
+
+def upload(training_dir, algorithm_id=None, writeup=None, api_key=None, ignore_open_monitors=False):
+    """Upload the results of training (as automatically recorded by your
+    env's monitor) to OpenAI Gym. See gym.scoreboard.api.upload for details.
+
+    The scoreboard (and its 'requests' dependency) is only imported
+    when you first call this, which keeps 'import gym' fast.
+    """
+    from gym.scoreboard import api
+    return api.upload(training_dir, algorithm_id=algorithm_id, writeup=writeup, api_key=api_key, ignore_open_monitors=ignore_open_monitors)
 
 __all__ = ["Env", "Space", "make", "spec", "upload"]
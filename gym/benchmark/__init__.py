@@ -0,0 +1,8 @@
+"""Tools for measuring the performance of gym and its environments.
+
+These are meant to be run from the command line, e.g.
+
+    python -m gym.benchmark --output results.json
+
+and are not imported by 'import gym'.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from gym.benchmark import throughput
+
+sys.exit(throughput.main())
@@ -0,0 +1,197 @@
+"""Microbenchmark of gym's own per-step overhead.
+
+The debugging envs (and a null env that does nothing at all) have
+essentially free dynamics, so timing them through each layer of the
+framework shows what that layer costs:
+
+- raw: the env's own _step/_reset
+- step: Env.step/Env.reset, with no monitor running
+- monitor: an active monitor with video disabled, not flushing stats
+- monitor_steps: as above, also recording per-step stats
+- monitor_flush: as monitor, but flushing stats on every reset (the
+  monitor's default)
+- monitor_steps_flush: as monitor_flush, also recording per-step stats
+- monitor_video: as monitor_flush, with video recording enabled. Only
+  envs which can render rgb_array frames record anything (here just the
+  null env), and this needs ffmpeg or avconv.
+
+Results are reported in nanoseconds per step, where resets needed by
+the (very short) debugging episodes are included in the per-step cost.
+
+Usage:
+
+    python -m gym.benchmark.overhead --output overhead.json
+    python -m gym.benchmark.overhead --compare overhead.json --threshold 0.3
+"""
+import argparse
+import logging
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+import gym
+from gym import envs, error, monitoring, spaces
+from gym.benchmark import results as benchmark_results
+from gym.benchmark.results import clock
+from gym.envs import registration
+
+logger = logging.getLogger(__name__)
+
+LAYERS = ['raw', 'step', 'monitor', 'monitor_steps', 'monitor_flush', 'monitor_steps_flush', 'monitor_video']
+
+ENV_IDS = [
+    'OneRoundDeterministicReward-v0',
+    'TwoRoundDeterministicReward-v0',
+    'OneRoundNondeterministicReward-v0',
+    'TwoRoundNondeterministicReward-v0',
+]
+
+class NullEnv(gym.Env):
+    """An env which does nothing, with episodes that never end."""
+    metadata = {'render.modes': ['rgb_array'], 'video.frames_per_second': 30}
+
+    def __init__(self):
+        self.action_space = spaces.Discrete(2)
+        self.observation_space = spaces.Discrete(1)
+        self._frame = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    def _step(self, action):
+        return 0, 0.0, False, {}
+
+    def _reset(self):
+        return 0
+
+    def _render(self, mode='rgb_array', close=False):
+        if close:
+            return
+        return self._frame
+
+def time_loop(step, reset, action, steps):
+    reset()
+    start = clock()
+    for _ in range(steps):
+        _, _, done, _ = step(action)
+        if done:
+            reset()
+    return clock() - start
+
+def time_layer(env, layer, steps):
+    """Returns the seconds taken for `steps` steps through `layer`."""
+    action = env.action_space.sample()
+    if layer == 'raw':
+        return time_loop(env._step, env._reset, action, steps)
+    elif layer == 'step':
+        return time_loop(env.step, env.reset, action, steps)
+
+    directory = tempfile.mkdtemp()
+    try:
+        if layer == 'monitor_video':
+            video_callable = lambda episode_id: True
+        else:
+            video_callable = False
+        if layer in ['monitor', 'monitor_steps']:
+            # Only write stats when the monitor is closed
+            flush_policy = monitoring.FlushPolicy(episodes=None)
+        else:
+            flush_policy = None
+        env.monitor.start(directory, video_callable=video_callable, flush_policy=flush_policy, step_stats=layer in ['monitor_steps', 'monitor_steps_flush'])
+        try:
+            return time_loop(env.step, env.reset, action, steps)
+        finally:
+            env.monitor.close()
+    finally:
+        shutil.rmtree(directory)
+
+def make(env_id):
+    if env_id == 'Null':
+        env = NullEnv()
+        # Not registered, but the monitor wants a spec. Null episodes
+        # are never cut short.
+        env.spec = registration.EnvSpec('Null-v0', timestep_limit=sys.maxsize)
+        return env
+    return envs.make(env_id)
+
+def benchmark_env(env_id, steps=10000, repeat=3, layers=LAYERS):
+    """Returns {'ns_per_step': {layer: ns}} for one env. Each layer is
+    timed `repeat` times, keeping the fastest."""
+    ns_per_step = {}
+    skipped = {}
+    for layer in layers:
+        best = None
+        for _ in range(repeat):
+            env = make(env_id)
+            try:
+                elapsed = time_layer(env, layer, steps)
+            except error.DependencyNotInstalled as e:
+                skipped[layer] = str(e)
+                break
+            finally:
+                env.close()
+            best = elapsed if best is None else min(best, elapsed)
+        if best is not None:
+            ns_per_step[layer] = best * 1e9 / steps
+
+    result = {'ns_per_step': ns_per_step}
+    if skipped:
+        result['skipped'] = skipped
+    return result
+
+def run(env_ids=None, steps=10000, repeat=3, layers=LAYERS):
+    results = {}
+    for env_id in env_ids or ENV_IDS + ['Null']:
+        logger.info('Measuring framework overhead with %s', env_id)
+        results[env_id] = benchmark_env(env_id, steps=steps, repeat=repeat, layers=layers)
+    return results
+
+def format_table(results, layers=LAYERS):
+    """Render ns/step per layer, and the cost each layer adds on top of
+    the previous one."""
+    lines = ['{:<36}'.format('env') + ''.join('{:>20}'.format(layer) for layer in layers)]
+    for env_id in sorted(results):
+        ns = results[env_id]['ns_per_step']
+        row = '{:<36}'.format(env_id)
+        previous = None
+        for layer in layers:
+            if layer not in ns:
+                row += '{:>20}'.format('-')
+                continue
+            if previous is None:
+                cell = '{:.0f}'.format(ns[layer])
+            else:
+                cell = '{:.0f} ({:+.0f})'.format(ns[layer], ns[layer] - previous)
+            row += '{:>20}'.format(cell)
+            previous = ns[layer]
+        lines.append(row)
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gym.benchmark.overhead', description="Measure gym's per-step framework overhead in ns/step.")
+    parser.add_argument('env_ids', nargs='*', help="Envs to run (default: the debugging envs and 'Null')")
+    parser.add_argument('--steps', type=int, default=10000, help='Steps per measurement')
+    parser.add_argument('--repeat', type=int, default=3, help='Measurements per layer (the fastest is kept)')
+    parser.add_argument('--layers', default=','.join(LAYERS), help='Comma-separated subset of {}'.format(','.join(LAYERS)))
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a saved results file; exit with status 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change counted as a regression (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    layers = args.layers.split(',')
+    results = run(args.env_ids, steps=args.steps, repeat=args.repeat, layers=layers)
+    print(format_table(results, layers))
+
+    if args.output:
+        benchmark_results.write_results(args.output, 'overhead', results)
+        logger.info('Wrote results to %s', args.output)
+
+    if args.compare:
+        baseline = benchmark_results.read_results(args.compare)
+        regressions = benchmark_results.compare(baseline['results'], results, threshold=args.threshold)
+        benchmark_results.report_regressions(regressions, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
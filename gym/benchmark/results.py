@@ -0,0 +1,95 @@
+"""Saving, loading and comparing benchmark results.
+
+Results are plain JSON documents of the form:
+
+    {
+        "benchmark": "throughput",
+        "gym_version": "0.1.7",
+        "python_version": "3.5.2",
+        "results": {<name>: {<metric>: <number or nested dict>}},
+    }
+
+Metrics are compared by their flattened, dot-separated names
+(e.g. 'CartPole-v0.reset_latency.p50'). Whether higher or lower is
+better is inferred from the name: throughputs ('per_second') should go
+up, everything else (latencies, times, memory) should go down.
+"""
+import json
+import logging
+import platform
+import time
+
+from gym import version
+from gym.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# The best monotonic clock available (time.perf_counter is Python 3.3+)
+clock = getattr(time, 'perf_counter', time.time)
+
+def percentiles(samples, ps=(50, 90, 99)):
+    """Summarize a list of latencies (in seconds)."""
+    samples = sorted(samples)
+    if not samples:
+        return None
+    summary = {'mean': sum(samples) / len(samples), 'max': samples[-1]}
+    for p in ps:
+        idx = min(len(samples) - 1, int(round(p / 100. * (len(samples) - 1))))
+        summary['p{}'.format(p)] = samples[idx]
+    return summary
+
+def write_results(path, benchmark, results):
+    with atomic_write.atomic_write(path) as f:
+        json.dump({
+            'benchmark': benchmark,
+            'gym_version': version.VERSION,
+            'python_version': platform.python_version(),
+            'timestamp': time.time(),
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+
+def read_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        name = '{}.{}'.format(prefix, key) if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def higher_is_better(name):
+    return 'per_second' in name
+
+def compare(baseline, current, threshold=0.2):
+    """Compare two 'results' dicts.
+
+    Returns a list of (name, baseline_value, current_value, relative_change)
+    for every metric that got worse by more than `threshold` (a fraction,
+    so 0.2 means 20%). Metrics missing on either side are ignored.
+    """
+    baseline = flatten(baseline)
+    current = flatten(current)
+
+    regressions = []
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name], current[name]
+        if old == 0:
+            continue
+        change = (new - old) / float(abs(old))
+        worse = -change if higher_is_better(name) else change
+        if worse > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+def report_regressions(regressions, threshold):
+    if not regressions:
+        logger.info('No regressions above %d%% found.', threshold * 100)
+        return
+    logger.warn('Found %d regressions above %d%%:', len(regressions), threshold * 100)
+    for name, old, new, change in regressions:
+        logger.warn('  %s: %.6g -> %.6g (%+.1f%%)', name, old, new, change * 100)
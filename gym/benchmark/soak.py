@@ -0,0 +1,194 @@
+"""Long-running soak test for memory growth and handle leaks.
+
+Runs many reset/step cycles per environment and periodically samples:
+
+- rss_bytes: resident memory of this process
+- open_fds: open file descriptors
+- child_processes: live child processes (e.g. ffmpeg, ViZDoom)
+- env_closeables / monitor_closeables: entries registered with the
+  env and monitor Closers (i.e. envs and monitors that were never
+  closed or garbage collected)
+
+After a warmup period, a line is fitted through each series and the
+environment fails if any slope (growth per 1000 cycles) exceeds its
+threshold.
+
+Usage:
+
+    python -m gym.benchmark.soak CartPole-v0 --cycles 1000000 --monitor
+    python -m gym.benchmark.soak --cycles 100000 --output soak.json
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from gym import core, envs
+from gym.benchmark import results as benchmark_results
+from gym.benchmark import throughput
+from gym.monitoring import monitor
+
+logger = logging.getLogger(__name__)
+
+# Maximum allowed growth per 1000 cycles
+THRESHOLDS = {
+    'rss_bytes': 16 * 1024,
+    'open_fds': 0.05,
+    'child_processes': 0.05,
+    'env_closeables': 0.05,
+    'monitor_closeables': 0.05,
+}
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+def open_fds():
+    for path in ['/proc/self/fd', '/dev/fd']:
+        if os.path.isdir(path):
+            # Subtract the fd used by listdir itself
+            return len(os.listdir(path)) - 1
+    return None
+
+def child_processes():
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        return len(psutil.Process().children(recursive=True))
+
+    if not os.path.isdir('/proc'):
+        return None
+    pid = os.getpid()
+    count = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry)) as f:
+                stat = f.read()
+        except (IOError, OSError):
+            continue # exited while we were looking
+        # The command name may contain spaces, so parse from the right
+        fields = stat[stat.rfind(')') + 2:].split()
+        if int(fields[1]) == pid:
+            count += 1
+    return count
+
+def sample():
+    return {
+        'rss_bytes': rss_bytes(),
+        'open_fds': open_fds(),
+        'child_processes': child_processes(),
+        'env_closeables': len(core.env_closer.closeables),
+        'monitor_closeables': len(monitor.monitor_closer.closeables),
+    }
+
+def slopes(cycles, samples, warmup=0.1):
+    """Least-squares growth per 1000 cycles of each sampled metric,
+    ignoring the first `warmup` fraction of samples."""
+    start = int(len(cycles) * warmup)
+    x = np.array(cycles[start:], dtype='float64') / 1000.
+    result = {}
+    for name in samples[0]:
+        y = [s[name] for s in samples[start:]]
+        if len(x) < 2 or any(v is None for v in y):
+            result[name] = None
+            continue
+        result[name] = float(np.polyfit(x, np.array(y, dtype='float64'), 1)[0])
+    return result
+
+def soak_env(env_id, cycles=1000000, samples=100, max_episode_steps=1000, use_monitor=False, video=False, thresholds=THRESHOLDS):
+    """Run `cycles` episodes of env_id. Returns a dict with the samples
+    taken, the fitted slopes, and the metrics whose slope exceeded its
+    threshold."""
+    spec = envs.spec(env_id)
+    reason = envs.skip_reason(spec)
+    if reason is not None:
+        return {'skipped': reason}
+    env, reason = throughput.make_env(spec)
+    if reason is not None:
+        return {'skipped': reason}
+
+    directory = None
+    if use_monitor:
+        directory = tempfile.mkdtemp()
+        env.monitor.start(directory, video_callable=None if video else False)
+
+    sample_every = max(1, cycles // samples)
+    sampled_cycles = []
+    sampled = []
+    action_sample = env.action_space.sample
+    try:
+        for cycle in range(cycles):
+            env.reset()
+            for _ in range(max_episode_steps):
+                _, _, done, _ = env.step(action_sample())
+                if done:
+                    break
+            if cycle % sample_every == 0:
+                sampled_cycles.append(cycle)
+                sampled.append(sample())
+    finally:
+        if use_monitor:
+            env.monitor.close()
+            shutil.rmtree(directory)
+        env.close()
+
+    fitted = slopes(sampled_cycles, sampled)
+    failures = sorted(name for name, slope in fitted.items()
+                      if slope is not None and slope > thresholds.get(name, float('inf')))
+    return {
+        'cycles': sampled_cycles,
+        'samples': sampled,
+        'slopes_per_1000_cycles': fitted,
+        'failures': failures,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gym.benchmark.soak', description='Soak-test environments for memory growth and leaked handles.')
+    parser.add_argument('env_ids', nargs='*', help='Environments to soak (default: all registered)')
+    parser.add_argument('--cycles', type=int, default=1000000, help='Reset/step episodes per env')
+    parser.add_argument('--samples', type=int, default=100, help='Number of resource samples per env')
+    parser.add_argument('--max-episode-steps', type=int, default=1000, help='Cap on steps per episode')
+    parser.add_argument('--monitor', action='store_true', help='Run with an active monitor')
+    parser.add_argument('--video', action='store_true', help='Record videos on the default schedule (implies --monitor)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    env_ids = args.env_ids or sorted(spec.id for spec in envs.registry.all())
+    results = {}
+    failed = False
+    for env_id in env_ids:
+        logger.info('Soaking %s for %d cycles', env_id, args.cycles)
+        result = soak_env(env_id, cycles=args.cycles, samples=args.samples, max_episode_steps=args.max_episode_steps,
+                          use_monitor=args.monitor or args.video, video=args.video)
+        results[env_id] = result
+        if 'skipped' in result:
+            logger.info('Skipped %s: %s', env_id, result['skipped'])
+        elif result['failures']:
+            failed = True
+            for name in result['failures']:
+                logger.error('%s: %s grew by %.3g per 1000 cycles (threshold %.3g)', env_id, name,
+                             result['slopes_per_1000_cycles'][name], THRESHOLDS[name])
+
+    if args.output:
+        benchmark_results.write_results(args.output, 'soak', results)
+        logger.info('Wrote results to %s', args.output)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+
+from gym import envs
+from gym.benchmark import overhead, results, soak, throughput
+from gym.envs import registration
+from gym.monitoring.tests import helpers
+
+def test_benchmark_env():
+    result = throughput.benchmark_env(envs.spec('TwoRoundDeterministicReward-v0'), steps=10, resets=5)
+    assert result['make_seconds'] >= 0
+    assert set(result['steps_per_second']) == set(['bare', 'monitor'])
+    assert result['reset_latency']['p50'] <= result['reset_latency']['p99']
+
+def test_skip_deprecated():
+    spec = registration.EnvSpec('Deprecated-v0', entry_point=None)
+    assert throughput.benchmark_env(spec) == {'skipped': 'deprecated'}
+
+def test_compare():
+    baseline = {'Env-v0': {'steps_per_second': {'bare': 1000.}, 'reset_latency': {'p50': 1e-3}}}
+    current = {'Env-v0': {'steps_per_second': {'bare': 700.}, 'reset_latency': {'p50': 1.1e-3}}}
+    regressions = results.compare(baseline, current, threshold=0.2)
+    assert [r[0] for r in regressions] == ['Env-v0.steps_per_second.bare']
+
+    # Getting faster is never a regression
+    assert results.compare(current, baseline, threshold=0.2) == []
+
+def test_main_writes_and_compares():
+    with helpers.tempdir() as temp:
+        path = os.path.join(temp, 'results.json')
+        assert throughput.main(['OneRoundDeterministicReward-v0', '--steps', '10', '--resets', '5', '--output', path]) == 0
+        saved = results.read_results(path)
+        assert 'OneRoundDeterministicReward-v0' in saved['results']
+        # Comparing a run against a generous threshold shouldn't flag anything
+        assert throughput.main(['OneRoundDeterministicReward-v0', '--steps', '10', '--resets', '5', '--compare', path, '--threshold', '1000']) == 0
+
+def test_overhead():
+    result = overhead.run(['Null', 'OneRoundDeterministicReward-v0'], steps=10, repeat=1, layers=['raw', 'step', 'monitor_flush'])
+    for env_id in ['Null', 'OneRoundDeterministicReward-v0']:
+        assert set(result[env_id]['ns_per_step']) == set(['raw', 'step', 'monitor_flush'])
+    assert 'monitor_flush' in overhead.format_table(result, ['raw', 'step', 'monitor_flush'])
+
+def test_soak():
+    result = soak.soak_env('CartPole-v0', cycles=20, samples=10)
+    assert len(result['samples']) == 10
+    assert set(result['slopes_per_1000_cycles']) == set(soak.THRESHOLDS)
+
+def test_soak_slopes():
+    cycles = [0, 1000, 2000, 3000]
+    samples = [{'open_fds': 10 + i} for i in range(4)]
+    slopes = soak.slopes(cycles, samples, warmup=0)
+    assert abs(slopes['open_fds'] - 1) < 1e-6
@@ -0,0 +1,176 @@
+"""Per-environment throughput and latency suite.
+
+For every registered environment (or the ones given on the command
+line) this measures:
+
+- make_seconds: time to construct the environment
+- reset_latency: latency percentiles of reset()
+- steps_per_second: step() throughput on its own ('bare'), with an
+  active monitor ('monitor'), and while rendering rgb_array frames
+  ('render')
+- peak_memory_bytes: peak memory allocated while making, resetting and
+  stepping the environment (requires tracemalloc, i.e. Python 3.4+)
+
+Usage:
+
+    python -m gym.benchmark --output results.json
+    python -m gym.benchmark CartPole-v0 FrozenLake-v0 --compare results.json
+"""
+import argparse
+import logging
+import shutil
+import sys
+import tempfile
+
+from gym import envs, error
+from gym.benchmark import results as benchmark_results
+from gym.benchmark.results import clock
+
+logger = logging.getLogger(__name__)
+
+MODES = ['bare', 'monitor', 'render']
+
+def make_env(spec):
+    """Returns (env, skip_reason)."""
+    try:
+        return spec.make(), None
+    except (error.DependencyNotInstalled, ImportError) as e:
+        return None, 'missing dependency: {}'.format(e)
+
+def run_steps(env, steps, render=False):
+    """Step with random actions for `steps` steps, resetting as needed.
+    Returns steps per second."""
+    env.reset()
+    sample = env.action_space.sample
+    start = clock()
+    for _ in range(steps):
+        _, _, done, _ = env.step(sample())
+        if render:
+            env.render(mode='rgb_array')
+        if done:
+            env.reset()
+    elapsed = clock() - start
+    return steps / elapsed if elapsed > 0 else float('inf')
+
+def measure_reset_latency(env, resets):
+    latencies = []
+    sample = env.action_space.sample
+    for _ in range(resets):
+        start = clock()
+        env.reset()
+        latencies.append(clock() - start)
+        # Take a step so resets don't run back to back, which some
+        # envs (and the monitor) special-case.
+        env.step(sample())
+    return benchmark_results.percentiles(latencies)
+
+def measure_peak_memory(spec, steps):
+    try:
+        import tracemalloc
+    except ImportError:
+        return None
+
+    tracemalloc.start()
+    try:
+        env = spec.make()
+        try:
+            run_steps(env, steps)
+        finally:
+            env.close()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def measure_monitored_steps(env, steps):
+    directory = tempfile.mkdtemp()
+    try:
+        env.monitor.start(directory, video_callable=False)
+        try:
+            return run_steps(env, steps)
+        finally:
+            env.monitor.close()
+    finally:
+        shutil.rmtree(directory)
+
+def benchmark_env(spec, steps=1000, resets=100, modes=MODES):
+    """Benchmark a single env spec. Returns a dict of metrics, or
+    {'skipped': reason} if the env could not be benchmarked."""
+    reason = envs.skip_reason(spec)
+    if reason is not None:
+        return {'skipped': reason}
+
+    start = clock()
+    env, reason = make_env(spec)
+    make_seconds = clock() - start
+    if reason is not None:
+        return {'skipped': reason}
+
+    result = {
+        'make_seconds': make_seconds,
+        'steps_per_second': {},
+    }
+    try:
+        env.seed(0)
+        result['reset_latency'] = measure_reset_latency(env, resets)
+        if 'bare' in modes:
+            result['steps_per_second']['bare'] = run_steps(env, steps)
+        if 'monitor' in modes:
+            result['steps_per_second']['monitor'] = measure_monitored_steps(env, steps)
+        if 'render' in modes and 'rgb_array' in env.metadata.get('render.modes', []):
+            try:
+                result['steps_per_second']['render'] = run_steps(env, steps, render=True)
+            except Exception as e:
+                # Usually means there is no display available
+                logger.warn('Could not render %s: %s', spec.id, e)
+                result['render_error'] = str(e)
+    finally:
+        env.close()
+
+    result['peak_memory_bytes'] = measure_peak_memory(spec, steps)
+    return result
+
+def run(env_ids=None, steps=1000, resets=100, modes=MODES):
+    if env_ids:
+        specs = [envs.spec(env_id) for env_id in env_ids]
+    else:
+        specs = sorted(envs.registry.all(), key=lambda spec: spec.id)
+
+    results = {}
+    for spec in specs:
+        logger.info('Benchmarking %s', spec.id)
+        try:
+            results[spec.id] = benchmark_env(spec, steps=steps, resets=resets, modes=modes)
+        except Exception as e:
+            logger.error('Benchmarking %s failed: %s', spec.id, e)
+            results[spec.id] = {'error': str(e)}
+        if 'skipped' in results[spec.id]:
+            logger.info('Skipped %s: %s', spec.id, results[spec.id]['skipped'])
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gym.benchmark', description='Measure the throughput and latency of registered environments.')
+    parser.add_argument('env_ids', nargs='*', help='Environments to benchmark (default: all registered)')
+    parser.add_argument('--steps', type=int, default=1000, help='Steps per throughput measurement')
+    parser.add_argument('--resets', type=int, default=100, help='Resets per latency measurement')
+    parser.add_argument('--modes', default=','.join(MODES), help='Comma-separated subset of {}'.format(','.join(MODES)))
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against a saved results file; exit with status 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative change counted as a regression (default: 0.2)')
+    args = parser.parse_args(argv)
+
+    results = run(args.env_ids, steps=args.steps, resets=args.resets, modes=args.modes.split(','))
+    if args.output:
+        benchmark_results.write_results(args.output, 'throughput', results)
+        logger.info('Wrote results to %s', args.output)
+
+    if args.compare:
+        baseline = benchmark_results.read_results(args.compare)
+        regressions = benchmark_results.compare(baseline['results'], results, threshold=args.threshold)
+        benchmark_results.report_regressions(regressions, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
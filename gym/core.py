@@ -180,7 +180,10 @@ class Env(object):
         elif mode not in modes:
             raise error.UnsupportedMode('Unsupported rendering mode: {}. (Supported modes for {}: {})'.format(mode, self, modes))
 
-        return self._render(mode=mode, close=close)
+        self.monitor._before_render()
+        frame = self._render(mode=mode, close=close)
+        self.monitor._after_render()
+        return frame
 
     def close(self):
         """Override _close in your subclass to perform any necessary cleanup.
@@ -214,7 +217,10 @@ class Env(object):
               'seed'. Often, the main seed equals the provided 'seed', but
               this won't be true if seed=None, for example.
         """
-        return self._seed(seed)
+        self.monitor._before_seed()
+        seeds = self._seed(seed)
+        self.monitor._after_seed()
+        return seeds
 
     def configure(self, *args, **kwargs):
         """Provides runtime configuration to the environment.
@@ -265,3 +271,15 @@ class Space(object):
         """Convert a JSONable data type to a batch of samples from this space."""
         # By default, assume identity is JSONable
         return sample_n
+
+    def to_binary(self, sample_n, compress=False):
+        """Convert a batch of samples from this space to a compact byte
+        string. Pass compress=True (or a zlib level) to compress it."""
+        # By default, fall back to the JSONable representation
+        from gym.spaces import codec
+        return codec.encode_json(self.to_jsonable(sample_n), compress=compress)
+
+    def from_binary(self, data):
+        """Convert a byte string from to_binary back to a batch of samples from this space."""
+        from gym.spaces import codec
+        return self.from_jsonable(codec.decode_json(data))
@@ -118,7 +118,7 @@ class CarRacing(gym.Env):
         self.prev_reward = 0.0
 
         self.action_space = spaces.Box( np.array([-1,0,0]), np.array([+1,+1,+1]))  # steer, gas, brake
-        self.observation_space = spaces.Box(low=0, high=255, shape=(STATE_H, STATE_W, 3))
+        self.observation_space = spaces.Box(low=0, high=255, shape=(STATE_H, STATE_W, 3), dtype=np.uint8)
 
     def _seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
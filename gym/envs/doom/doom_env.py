@@ -74,7 +74,7 @@ class DoomEnv(gym.Env, utils.EzPickle):
             self.screen_width = 160
             self.screen_resolution = ScreenResolution.RES_160X120
 
-        self.observation_space = spaces.Box(low=0, high=255, shape=(self.screen_height, self.screen_width, 3))
+        self.observation_space = spaces.Box(low=0, high=255, shape=(self.screen_height, self.screen_width, 3), dtype=np.uint8)
 
     def _load_level(self):
         # Closing if is_initialized
@@ -1,37 +1,19 @@
 import numpy as np
 from nose2 import tools
-import os
 
 import logging
 logger = logging.getLogger(__name__)
 
 import gym
-from gym import envs
+from gym import envs, spaces
 
 def should_skip_env_spec_for_tests(spec):
     # We skip tests for envs that require dependencies or are otherwise
     # troublesome to run frequently
-
-    # Skip mujoco tests for pull request CI
-    skip_mujoco = not (os.environ.get('MUJOCO_KEY_BUNDLE') or os.path.exists(os.path.expanduser('~/.mujoco')))
-    if skip_mujoco and spec._entry_point.startswith('gym.envs.mujoco:'):
-        return True
-
-    # TODO(jonas 2016-05-11): Re-enable these tests after fixing box2d-py
-    if spec._entry_point.startswith('gym.envs.box2d:'):
-        logger.warn("Skipping tests for box2d env {}".format(spec._entry_point))
-        return True
-
-    # TODO: Issue #167 - Re-enable these tests after fixing DoomDeathmatch crash
-    if spec._entry_point.startswith('gym.envs.doom:DoomDeathmatchEnv'):
-        logger.warn("Skipping tests for DoomDeathmatchEnv {}".format(spec._entry_point))
-        return True
-
-    # Skip ConvergenceControl tests (the only env in parameter_tuning) according to pull #104
-    if spec._entry_point.startswith('gym.envs.parameter_tuning:'):
-        logger.warn("Skipping tests for parameter_tuning env {}".format(spec._entry_point))
+    reason = envs.skip_reason(spec, testing=True)
+    if reason is not None:
+        logger.warn("Skipping tests for {}: {}".format(spec._entry_point, reason))
         return True
-
     return False
 
 
@@ -49,6 +31,9 @@ def test_env(spec):
     act_space = env.action_space
     ob = env.reset()
     assert ob_space.contains(ob), 'Reset observation: {!r} not in space'.format(ob)
+    if isinstance(ob_space, spaces.Box):
+        # sample() and real observations should agree
+        assert ob.dtype == ob_space.dtype, 'Reset observation has dtype {}, but {} declares {}'.format(ob.dtype, ob_space, ob_space.dtype)
     a = act_space.sample()
     observation, reward, done, _info = env.step(a)
     assert ob_space.contains(observation), 'Step observation: {!r} not in space'.format(observation)
@@ -48,3 +48,12 @@ def test_malformed_lookup():
         assert 'malformed environment ID' in '{}'.format(e), 'Unexpected message: {}'.format(e)
     else:
         assert False
+
+def test_load():
+    assert registration.load('gym.envs.classic_control:CartPoleEnv') is cartpole.CartPoleEnv
+    assert registration.load('gym.envs.classic_control.cartpole:CartPoleEnv.reset') is cartpole.CartPoleEnv.reset
+
+def test_make_caches_entry_point():
+    spec = envs.spec('CartPole-v0')
+    spec.make()
+    assert spec._entry_point_cls is cartpole.CartPoleEnv
@@ -1,3 +1,7 @@
-from gym.monitoring.monitor import Monitor, load_results, _open_monitors
+from gym.monitoring.flush_policy import FlushPolicy
+from gym.monitoring.monitor import Monitor, TimeBudgetVideoSchedule, load_results, load_step_stats, _open_monitors
+from gym.monitoring.results_reader import ResultsReader
 from gym.monitoring.stats_recorder import StatsRecorder
+from gym.monitoring.step_recorder import StepRecorder
+from gym.monitoring.trace import Tracer, merge_traces
 from gym.monitoring.video_recorder import VideoRecorder
@@ -0,0 +1,173 @@
+"""Compact a training directory written by many monitors.
+
+Every monitor leaves its own manifest and stats files behind, so a
+directory written by many worker processes ends up with thousands of
+small files, which load_results and uploads then have to open one by
+one. Compaction merges the stats of every finished monitor into a
+single time-sorted columnar file, and their manifests into a single
+manifest:
+
+    python -m gym.monitoring.compact /path/to/training_dir ...
+
+It is safe to run while training is still writing to the directory:
+monitors which are still running are left alone, and can be picked up
+by a later compaction. A monitor counts as finished once it has been
+closed, or if it ran on this host and its process has exited. Monitors
+on other hosts, e.g. writing to shared storage, are only compacted
+once closed, unless --assume-dead is given. Videos, step stats and traces stay where they
+are; the compacted manifest refers to them.
+"""
+import argparse
+import errno
+import json
+import logging
+import os
+import re
+import socket
+import sys
+
+from gym.monitoring import monitor, stats_recorder
+from gym.utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+COMPACTED_MANIFEST_RE = re.compile(r'^{}\.compacted\.(\d+)\.manifest\.json$'.format(re.escape(monitor.MANIFEST_PREFIX)))
+MONITOR_MANIFEST_RE = re.compile(r'^{}\.\d+\.(\d+)\.manifest\.json$'.format(re.escape(monitor.MANIFEST_PREFIX)))
+
+def compact(training_dir, assume_dead=False):
+    """Merge the stats and manifests of all finished monitors in
+    training_dir. Returns the path of the compacted manifest, or None
+    if there was nothing to compact.
+
+    The merged stats and manifest are written atomically before any
+    source file is removed. The compacted manifest lists the manifests
+    it replaces, and readers ignore those, so a crash part way through
+    never double-counts episodes. Whatever a crashed compaction left
+    behind is removed by the next one.
+
+    With assume_dead=True, monitors which were never closed are
+    compacted too, wherever they ran. Only use it once every process
+    writing to training_dir has stopped.
+    """
+    _remove_superseded(training_dir)
+    manifests = [(path, contents) for path, contents in monitor.read_manifests(training_dir)
+                 if assume_dead or not _is_live(path, contents)]
+    if len(manifests) < 2:
+        return None
+
+    generation = 1 + max([_compacted_generation(path) for path in monitor.detect_training_manifests(training_dir)] + [0])
+    stats_path = os.path.join(training_dir, '{}.episode_batch.compacted.{:06}.stats.npz'.format(monitor.FILE_PREFIX, generation))
+    manifest_path = os.path.join(training_dir, '{}.compacted.{:06}.manifest.json'.format(monitor.MANIFEST_PREFIX, generation))
+
+    stats_files = [monitor.manifest_stats_file(training_dir, contents) for _, contents in manifests]
+    timestamps, episode_lengths, episode_rewards, initial_reset_timestamp = monitor.merge_stats_files(stats_files, as_numpy=True)
+    stats_recorder.save_columnar(stats_path, timestamps, episode_lengths, episode_rewards, initial_reset_timestamp)
+
+    compacted = {
+        'stats': os.path.basename(stats_path),
+        'videos': [],
+        'env_info': monitor.collapse_env_infos([contents['env_info'] for _, contents in manifests], training_dir),
+        'seeds': [],
+        'main_seeds': [],
+        'step_stats_groups': [],
+        'closed': True,
+        'compacted_sources': [os.path.basename(path) for path, _ in manifests],
+    }
+    for _, contents in manifests:
+        compacted['videos'] += contents['videos']
+        seeds = contents.get('seeds') or []
+        compacted['seeds'] += seeds
+        if 'main_seeds' in contents:
+            compacted['main_seeds'] += contents['main_seeds']
+        else:
+            compacted['main_seeds'].append(seeds[0] if seeds else None)
+        if 'step_stats_groups' in contents:
+            compacted['step_stats_groups'] += contents['step_stats_groups']
+        elif contents.get('step_stats'):
+            compacted['step_stats_groups'].append(contents['step_stats'])
+
+    with atomic_write.atomic_write(manifest_path, fsync=True) as f:
+        json.dump(compacted, f)
+    logger.info('Compacted %d monitors with %d episodes into %s', len(manifests), len(timestamps), manifest_path)
+
+    _remove_sources(training_dir, manifests)
+    return manifest_path
+
+def _remove_sources(training_dir, manifests):
+    for path, contents in manifests:
+        for name in [contents['stats'], contents.get('stats_log')]:
+            if name:
+                _remove(os.path.join(training_dir, name))
+        # Last, since this is what marks the other files as in use
+        _remove(path)
+
+def _remove_superseded(training_dir):
+    """Remove the sources of earlier compactions which are still around,
+    e.g. because a compaction crashed before removing them. Readers
+    already ignore them."""
+    manifests = {}
+    for path in monitor.detect_training_manifests(training_dir):
+        try:
+            with open(path) as f:
+                manifests[os.path.basename(path)] = (path, json.load(f))
+        except (IOError, OSError):
+            # Removed by a concurrent compaction
+            continue
+    superseded = set()
+    for _, contents in manifests.values():
+        superseded.update(contents.get('compacted_sources', []))
+    leftovers = [manifests[name] for name in superseded if name in manifests]
+    if leftovers:
+        logger.info('Removing %d monitors left over from an earlier compaction of %s', len(leftovers), training_dir)
+        _remove_sources(training_dir, leftovers)
+
+def _compacted_generation(path):
+    match = COMPACTED_MANIFEST_RE.match(os.path.basename(path))
+    return int(match.group(1)) if match else 0
+
+def _is_live(path, contents):
+    """Whether a monitor may still be writing to this manifest."""
+    if contents.get('closed'):
+        return False
+    match = MONITOR_MANIFEST_RE.match(os.path.basename(path))
+    if match is None:
+        # Not a name we recognise, so don't touch it
+        return True
+    if contents.get('hostname') != socket.gethostname():
+        # We can't see processes on other hosts. (Older manifests
+        # don't say where they were written.)
+        return True
+    # A monitor which wasn't closed is still running, unless its
+    # process has died. Its pid may since have been reused, which only
+    # makes us wait longer.
+    pid = int(match.group(1))
+    if pid == os.getpid() or sys.platform.startswith('win'):
+        # (On Windows, os.kill would terminate the process.)
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gym.monitoring.compact', description='Compact monitor training directories.')
+    parser.add_argument('training_dirs', nargs='+', help='Monitor directories to compact')
+    parser.add_argument('--assume-dead', action='store_true', help='Also compact monitors which were never closed. Only use this once all training has stopped.')
+    args = parser.parse_args(argv)
+
+    for training_dir in args.training_dirs:
+        path = compact(training_dir, assume_dead=args.assume_dead)
+        if path is None:
+            logger.info('Nothing to compact in %s', training_dir)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+class FlushPolicy(object):
+    """Controls when a monitor writes its stats and manifest to disk.
+
+    The default flushes on every reset, synchronously. For example:
+
+        # Every 100 episodes, and at least once a minute, without ever
+        # blocking the training thread on disk I/O
+        FlushPolicy(episodes=100, seconds=60, background=True)
+
+        # Only when the monitor is closed
+        FlushPolicy(episodes=None)
+
+    Args:
+        episodes (Optional[int]): Flush after this many completed episodes.
+        seconds (Optional[float]): Flush when this many seconds have passed since the last flush. With background=True this also happens in the middle of long episodes.
+        background (bool): Encode and write on a background thread, so that resets never block on disk I/O.
+        fsync (bool): Force written data to disk, bounding how much a machine crash can lose.
+    """
+
+    def __init__(self, episodes=1, seconds=None, background=False, fsync=False):
+        self.episodes = episodes
+        self.seconds = seconds
+        self.background = background
+        self.fsync = fsync
+
+    def due(self, episodes, last_flush_time):
+        """Whether to flush, given the episodes completed and the time of
+        the last flush."""
+        if self.episodes is not None and episodes >= self.episodes:
+            return True
+        if self.seconds is not None and time.time() - last_flush_time >= self.seconds:
+            return True
+        return False
+
+    def __repr__(self):
+        return 'FlushPolicy(episodes={}, seconds={}, background={}, fsync={})'.format(self.episodes, self.seconds, self.background, self.fsync)
+
+class BackgroundFlusher(object):
+    """Runs monitor flushes on a daemon thread: whenever one is requested,
+    and otherwise every `seconds` (if given).
+
+    We only hold a weak reference to the monitor, so that an abandoned
+    monitor can still be garbage collected (and thereby closed).
+    """
+
+    def __init__(self, monitor, seconds=None):
+        self._monitor = weakref.ref(monitor)
+        self._seconds = seconds
+        self._requested = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='gym-monitor-flusher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def request(self):
+        self._requested.set()
+
+    def stop(self):
+        """Stop the thread, waiting for any flush in progress. Callers
+        should do a final synchronous flush afterwards."""
+        self._stopped = True
+        self._requested.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            self._requested.wait(self._seconds)
+            self._requested.clear()
+            if self._stopped:
+                return
+            monitor = self._monitor()
+            if monitor is None:
+                return
+            try:
+                monitor.flush()
+            except Exception:
+                logger.exception('Error while flushing monitor in the background')
+            # Don't keep the monitor alive while we're waiting
+            del monitor
@@ -0,0 +1,101 @@
+import math
+import time
+
+if hasattr(time, 'perf_counter'):
+    clock = time.perf_counter
+else:
+    clock = time.time
+
+# Each power of two (in nanoseconds) is split into this many buckets,
+# so bucket boundaries are at most ~19% apart.
+BUCKETS_PER_OCTAVE = 4
+# 2**40 ns is about 18 minutes; anything slower lands in the last bucket
+NUM_BUCKETS = 40 * BUCKETS_PER_OCTAVE
+
+class Histogram(object):
+    """A fixed-size histogram of durations, with logarithmically spaced
+    buckets from 1ns to ~18 minutes. Recording is O(1) in time and
+    memory, however many durations are recorded."""
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        ns = seconds * 1e9
+        if ns < 1:
+            i = 0
+        else:
+            mantissa, exponent = math.frexp(ns)
+            # mantissa is in [0.5, 1)
+            i = min(exponent * BUCKETS_PER_OCTAVE + int((mantissa - 0.5) * 2 * BUCKETS_PER_OCTAVE), NUM_BUCKETS - 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def bucket_upper_bound(i):
+        """The upper bound of bucket i, in seconds."""
+        exponent, sub = divmod(i, BUCKETS_PER_OCTAVE)
+        return (0.5 + (sub + 1) / (2. * BUCKETS_PER_OCTAVE)) * 2 ** exponent / 1e9
+
+    def percentile(self, q):
+        """An upper bound on the q-th percentile (0 <= q <= 100), accurate
+        to within a bucket."""
+        if self.count == 0:
+            return None
+        rank = q / 100. * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if i == NUM_BUCKETS - 1:
+                    # The last bucket has no upper bound
+                    return self.max
+                return min(self.bucket_upper_bound(i), self.max)
+        return self.max
+
+    def summary(self):
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': self.total / self.count,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+class LatencyMetrics(object):
+    """Latency histograms for one monitored environment:
+
+    - step: the env's _step
+    - reset: the env's _reset
+    - render: every call to render, including those made to record video
+    - capture_frame: capturing a video frame, including its render
+    - think: the agent's time between the end of one step or reset and
+      the start of the next
+    """
+
+    NAMES = ['step', 'reset', 'render', 'capture_frame', 'think']
+
+    def __init__(self):
+        self.histograms = dict((name, Histogram()) for name in self.NAMES)
+        self.step = self.histograms['step']
+        self.reset = self.histograms['reset']
+        self.render = self.histograms['render']
+        self.capture_frame = self.histograms['capture_frame']
+        self.think = self.histograms['think']
+
+    def summary(self):
+        """Summary statistics of each histogram, in seconds."""
+        return dict((name, histogram.summary()) for name, histogram in self.histograms.items())
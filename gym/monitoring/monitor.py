@@ -1,25 +1,58 @@
+import array
 import atexit
+import heapq
 import logging
 import json
 import numpy as np
 import os
 import six
+import socket
 import sys
 import threading
+import time
 import weakref
 
 from gym import error, version
-from gym.monitoring import stats_recorder, video_recorder
+from gym.monitoring import stats_recorder, step_recorder, trace as trace_module, video_recorder
+from gym.monitoring import metrics as metrics_module
+from gym.monitoring.flush_policy import BackgroundFlusher, FlushPolicy
 from gym.utils import atomic_write, closer, seeding
 
 logger = logging.getLogger(__name__)
 
 FILE_PREFIX = 'openaigym'
 MANIFEST_PREFIX = FILE_PREFIX + '.manifest'
+# Written by load_results; removed along with other monitor files on force=True
+MERGED_STATS_CACHE = FILE_PREFIX + '.merged_stats.npz'
 
 def detect_training_manifests(training_dir):
     return [os.path.join(training_dir, f) for f in os.listdir(training_dir) if f.startswith(MANIFEST_PREFIX + '.')]
 
+def read_manifests(training_dir):
+    """Returns (path, contents) for each manifest in training_dir,
+    except those which have been merged into a compacted manifest (see
+    gym.monitoring.compact) but not yet removed."""
+    manifests = []
+    for path in detect_training_manifests(training_dir):
+        try:
+            with open(path) as f:
+                manifests.append((path, json.load(f)))
+        except (IOError, OSError):
+            # Removed by a concurrent compaction
+            continue
+    superseded = set()
+    for _, contents in manifests:
+        superseded.update(contents.get('compacted_sources', []))
+    return [(path, contents) for path, contents in manifests if os.path.basename(path) not in superseded]
+
+def manifest_stats_file(training_dir, contents):
+    """The stats file a manifest refers to. We prefer the append-only
+    log, which is always at least as recent as the snapshot."""
+    stats_log = contents.get('stats_log')
+    if stats_log and os.path.exists(os.path.join(training_dir, stats_log)):
+        return os.path.join(training_dir, stats_log)
+    return os.path.join(training_dir, contents['stats'])
+
 def detect_monitor_files(training_dir):
     return [os.path.join(training_dir, f) for f in os.listdir(training_dir) if f.startswith(FILE_PREFIX + '.')]
 
@@ -41,6 +74,55 @@ def capped_cubic_video_schedule(episode_id):
 def disable_videos(episode_id):
     return False
 
+class TimeBudgetVideoSchedule(object):
+    """A video_callable which records as many videos as fit in a share
+    of the run's wall-clock time, rather than choosing episodes by index.
+
+    The monitor reports the time spent capturing and encoding each video
+    (see video_recorded), so the recording rate adapts to how expensive
+    the env is to render: cheap envs are recorded often, and slow ones
+    like CarRacing rarely. The first episode is always recorded, to
+    measure the cost.
+
+    Example:
+
+        env.monitor.configure(video_callable=TimeBudgetVideoSchedule(budget=0.02))
+
+    Args:
+        budget (float): The fraction of time since the first episode to spend on video.
+    """
+
+    def __init__(self, budget=0.02):
+        if not 0 < budget <= 1:
+            raise error.Error('Video budget must be a fraction of run time in (0, 1], not {}'.format(budget))
+        self.budget = budget
+        self.videos = 0
+        self.frames = 0
+        self.seconds = 0.
+        self._start = None
+
+    def __call__(self, episode_id):
+        now = metrics_module.clock()
+        if self._start is None:
+            self._start = now
+        if self.videos == 0:
+            return True
+        # Only start a video if it's expected to fit in the budget
+        expected = self.seconds / self.videos
+        return self.seconds + expected <= self.budget * (now - self._start)
+
+    def video_recorded(self, seconds, frames):
+        """Called by the monitor with the cost of each video it records."""
+        self.videos += 1
+        self.frames += frames
+        self.seconds += seconds
+
+    @property
+    def seconds_per_frame(self):
+        if self.frames == 0:
+            return None
+        return self.seconds / self.frames
+
 monitor_closer = closer.Closer()
 
 # This method gets used for a sanity check in scoreboard/api.py. It's
@@ -82,13 +164,32 @@ class Monitor(object):
         self.videos = []
 
         self.stats_recorder = None
+        self.step_recorder = None
         self.video_recorder = None
         self.enabled = False
         self.episode_id = 0
         self._monitor_id = None
         self.seeds = None
-
-    def start(self, directory, video_callable=None, force=False, resume=False, seed=None):
+        self._last_manifest = None
+
+        self.video_options = {}
+        self.flush_policy = FlushPolicy()
+        self._flusher = None
+        self._flush_lock = threading.Lock()
+        self._episodes_since_flush = 0
+        self._last_flush_time = None
+
+        self.latency = None
+        # Whether to time steps, for step stats or latency metrics
+        self._timed = False
+        self._step_action = None
+        self._step_start = None
+        self._reset_start = None
+        self._last_step_end = None
+        self._render_start = None
+        self.tracer = None
+
+    def start(self, directory, video_callable=None, force=False, resume=False, seed=None, flush_policy=None, step_stats=False, video_options=None, metrics=False, trace=False):
         """Start monitoring.
 
         Args:
@@ -97,6 +198,11 @@ class Monitor(object):
             force (bool): Clear out existing training data from this directory (by deleting every file prefixed with "openaigym.").
             resume (bool): Retain the training data already in this directory, which will be merged with our new data
             seed (Optional[int]): The seed to run this environment with. By default, a random seed will be chosen.
+            flush_policy (Optional[FlushPolicy]): When to write stats to disk. By default, this happens synchronously on every reset.
+            step_stats (bool): Also record the action, reward and duration of every step (see StepRecorder). These are loaded with 'load_step_stats'.
+            metrics (bool): Keep histograms of step, reset, render and video capture latencies, and of the agent's time between steps. Their summaries are available from 'metrics()' and written to the manifest.
+            trace (bool): Write a Chrome trace of env and monitor activity (see gym.monitoring.trace).
+            video_options (Optional[dict]): Keyword arguments for each VideoRecorder, e.g. {'drop_frames': True} to drop frames rather than stall when video encoding falls behind, or {'capture_every': 2, 'target_size': (320, 240)} for smaller, cheaper videos.
         """
         if self.env.spec is None:
             logger.warn("Trying to monitor an environment which has no 'spec' set. This usually means you did not create it via 'gym.make', and is recommended only for advanced users.")
@@ -124,6 +230,7 @@ class Monitor(object):
 
 
         self._monitor_id = monitor_closer.register(self)
+        self._last_manifest = None
 
         self.enabled = True
         self.directory = os.path.abspath(directory)
@@ -132,42 +239,116 @@ class Monitor(object):
         self.file_prefix = FILE_PREFIX
         self.file_infix = '{}.{}'.format(self._monitor_id, os.getpid())
         self.stats_recorder = stats_recorder.StatsRecorder(directory, '{}.episode_batch.{}'.format(self.file_prefix, self.file_infix))
-        self.configure(video_callable=video_callable)
+        if step_stats:
+            self.step_recorder = step_recorder.StepRecorder(directory, '{}.episode_batch.{}'.format(self.file_prefix, self.file_infix))
+        else:
+            self.step_recorder = None
+        self.latency = metrics_module.LatencyMetrics() if metrics else None
+        self._timed = step_stats or metrics
+        self._last_step_end = None
+        if trace:
+            self._start_tracer()
+        else:
+            # Don't keep writing to a trace from a previous start
+            self.tracer = None
+        self._last_flush_time = time.time()
+        self.configure(video_callable=video_callable, flush_policy=flush_policy or FlushPolicy(), video_options=video_options)
         if not os.path.exists(directory):
             os.mkdir(directory)
 
         seeds = self.env.seed(seed)
         self.seeds = seeds
 
-    def flush(self):
-        """Flush all relevant monitor information to disk."""
-        self.stats_recorder.flush()
+    def _start_tracer(self):
+        path = os.path.join(self.directory, '{}.trace.{}.json'.format(self.file_prefix, self.file_infix))
+        args = {'monitor_id': self._monitor_id, 'file_infix': self.file_infix}
+        if self.env.spec:
+            args['env_id'] = self.env.spec.id
+        self.tracer = trace_module.Tracer(path, pid=os.getpid(), args=args)
+        # The env was made before we were started, but EnvSpec.make
+        # records when that happened.
+        make_interval = getattr(self.env, '_make_interval', None)
+        if make_interval is not None:
+            self.tracer.begin('make', make_interval[0])
+            self.tracer.end('make', make_interval[1])
+
+    def flush(self, force=False):
+        """Flush all relevant monitor information to disk.
+
+        The manifest and stats snapshot are queued along with every
+        other monitor's (see atomic_write.group_commit_write), and land
+        within a second. Pass force=True to wait until they have.
+        """
+        # May be called from the background flusher as well as the
+        # training thread
+        with self._flush_lock:
+            self._flush()
+        if force:
+            atomic_write.group_commit_flush()
+
+    def _flush(self):
+        if self.tracer is not None:
+            self.tracer.begin('flush')
+        self._episodes_since_flush = 0
+        self._last_flush_time = time.time()
+        self.stats_recorder.flush(fsync=self.flush_policy.fsync)
+        if self.step_recorder is not None:
+            self.step_recorder.flush(fsync=self.flush_policy.fsync)
+        self._write_manifest()
+        if self.tracer is not None:
+            self.tracer.end('flush')
+            self.tracer.flush()
+
+    def _write_manifest(self):
+        # We need to write relative paths here since people may
+        # move the training_dir around. It would be cleaner to
+        # already have the basenames rather than basename'ing
+        # manually, but this works for now.
+        manifest = {
+            'stats': os.path.basename(self.stats_recorder.path),
+            'stats_log': os.path.basename(self.stats_recorder.log_path),
+            'videos': [(os.path.basename(v), os.path.basename(m))
+                       for v, m in list(self.videos)],
+            'env_info': self._env_info(),
+            # Lets compaction tell whether our process is still running
+            'hostname': socket.gethostname(),
+            'seeds': self.seeds,
+        }
+        if self.latency is not None:
+            manifest['metrics'] = self.latency.summary()
+        if self.tracer is not None:
+            manifest['trace'] = os.path.basename(self.tracer.path)
+        if self.stats_recorder.closed:
+            # Lets compaction know we're done with this manifest
+            manifest['closed'] = True
+        if self.step_recorder is not None:
+            manifest['step_stats'] = [os.path.basename(path) for path in self.step_recorder.chunks]
+        # The manifest only changes when a video is added, so most
+        # flushes don't need to touch it.
+        if manifest == self._last_manifest:
+            return
 
         # Give it a very distiguished name, since we need to pick it
         # up from the filesystem later.
         path = os.path.join(self.directory, '{}.manifest.{}.manifest.json'.format(self.file_prefix, self.file_infix))
         logger.debug('Writing training manifest file to %s', path)
-        with atomic_write.atomic_write(path) as f:
-            # We need to write relative paths here since people may
-            # move the training_dir around. It would be cleaner to
-            # already have the basenames rather than basename'ing
-            # manually, but this works for now.
-            json.dump({
-                'stats': os.path.basename(self.stats_recorder.path),
-                'videos': [(os.path.basename(v), os.path.basename(m))
-                           for v, m in self.videos],
-                'env_info': self._env_info(),
-                'seeds': self.seeds,
-            }, f)
+        # Committed in a batch with the files of every other monitor in
+        # the process, after our stats snapshot
+        atomic_write.group_commit_write(path, json.dumps(manifest), fsync=self.flush_policy.fsync)
+        self._last_manifest = manifest
 
     def close(self):
         """Flush all monitor data to disk and close any open rending windows."""
         if not self.enabled:
             return
-        self.stats_recorder.close()
+        self._stop_flusher()
+        with self._flush_lock:
+            self.stats_recorder.close(fsync=self.flush_policy.fsync)
+            if self.step_recorder is not None:
+                self.step_recorder.close(fsync=self.flush_policy.fsync)
         if self.video_recorder is not None:
             self._close_video_recorder()
-        self.flush()
+        self.flush(force=True)
 
         # Note we'll close the env's rendering window even if we did
         # not open it. There isn't a particular great way to know if
@@ -184,6 +365,9 @@ class Monitor(object):
             # because we couldn't close the renderer.
             logger.error('Could not close renderer for %s: %s', key, e)
 
+        if self.tracer is not None:
+            self.tracer.close()
+
         # Remove the env's pointer to this monitor
         del self.env._monitor
         # Stop tracking this for autoclose
@@ -193,21 +377,69 @@ class Monitor(object):
 
         logger.info('''Finished writing results. You can upload them to the scoreboard via gym.upload(%r)''', self.directory)
 
-    def configure(self, video_callable=None):
+    def configure(self, video_callable=None, flush_policy=None, video_options=None):
         """Reconfigure the monitor.
 
             video_callable (function): Whether to record video to upload to the scoreboard.
+            flush_policy (FlushPolicy): When to write stats to disk.
+            video_options (dict): Keyword arguments for each VideoRecorder, taking effect from the next episode.
         """
 
         if video_callable is not None:
             self.video_callable = video_callable
 
+        if video_options is not None:
+            self.video_options = dict(video_options)
+
+        if flush_policy is not None:
+            self._stop_flusher()
+            self.flush_policy = flush_policy
+            if self.enabled and flush_policy.background:
+                self._flusher = BackgroundFlusher(self, seconds=flush_policy.seconds)
+
+    def _stop_flusher(self):
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+
+    def _maybe_flush(self):
+        self._episodes_since_flush += 1
+        if not self.flush_policy.due(self._episodes_since_flush, self._last_flush_time):
+            return
+        if self._flusher is not None:
+            # Reset the count now, so we only request once
+            self._episodes_since_flush = 0
+            self._flusher.request()
+        else:
+            self.flush()
+
+    def metrics(self):
+        """Summaries of the latency histograms (in seconds), if the
+        monitor was started with metrics=True, or else None."""
+        if self.latency is None:
+            return None
+        return self.latency.summary()
+
     def _before_step(self, action):
         if not self.enabled: return
         self.stats_recorder.before_step(action)
+        if self.step_recorder is not None:
+            self._step_action = action
+        if self._timed:
+            self._step_start = metrics_module.clock()
+            if self.latency is not None and self._last_step_end is not None:
+                self.latency.think.record(self._step_start - self._last_step_end)
+        if self.tracer is not None:
+            self.tracer.begin('step')
 
     def _after_step(self, observation, reward, done, info):
         if not self.enabled: return done
+        if self.tracer is not None:
+            self.tracer.end('step')
+        if self._timed:
+            duration = metrics_module.clock() - self._step_start
+            if self.latency is not None:
+                self.latency.step.record(duration)
 
         # Add 1 since about to take another step
         if self.env.spec and self.stats_recorder.steps+1 >= self.env.spec.timestep_limit:
@@ -216,21 +448,37 @@ class Monitor(object):
 
         # Record stats
         self.stats_recorder.after_step(observation, reward, done, info)
+        if self.step_recorder is not None:
+            self.step_recorder.record(self._step_action, reward, duration)
         # Record video
-        self.video_recorder.capture_frame()
+        self._capture_frame()
 
+        if self.latency is not None:
+            self._last_step_end = metrics_module.clock()
         return done
 
 
     def _before_reset(self):
         if not self.enabled: return
         self.stats_recorder.before_reset()
+        if self.latency is not None:
+            self._reset_start = metrics_module.clock()
+            if self._last_step_end is not None:
+                self.latency.think.record(self._reset_start - self._last_step_end)
+        if self.tracer is not None:
+            self.tracer.begin('reset')
 
     def _after_reset(self, observation):
         if not self.enabled: return
+        if self.tracer is not None:
+            self.tracer.end('reset')
+        if self.latency is not None:
+            self.latency.reset.record(metrics_module.clock() - self._reset_start)
 
         # Reset the stat count
         self.stats_recorder.after_reset(observation)
+        if self.step_recorder is not None:
+            self.step_recorder.start_episode(self.episode_id)
 
         # Close any existing video recorder
         if self.video_recorder:
@@ -244,18 +492,60 @@ class Monitor(object):
             base_path=os.path.join(self.directory, '{}.video.{}.video{:06}'.format(self.file_prefix, self.file_infix, self.episode_id)),
             metadata={'episode_id': self.episode_id},
             enabled=self._video_enabled(),
+            tracer=self.tracer,
+            **self.video_options
         )
-        self.video_recorder.capture_frame()
+        self._video_seconds = 0.
+        self._capture_frame()
 
         # Bump *after* all reset activity has finished
         self.episode_id += 1
 
-        self.flush()
+        self._maybe_flush()
+        if self.latency is not None:
+            self._last_step_end = metrics_module.clock()
+
+    def _before_render(self):
+        if self.latency is not None:
+            self._render_start = metrics_module.clock()
+        if self.tracer is not None:
+            self.tracer.begin('render')
+
+    def _after_render(self):
+        if self.tracer is not None:
+            self.tracer.end('render')
+        if self.latency is not None:
+            self.latency.render.record(metrics_module.clock() - self._render_start)
+
+    def _before_seed(self):
+        if self.tracer is not None:
+            self.tracer.begin('seed')
+
+    def _after_seed(self):
+        if self.tracer is not None:
+            self.tracer.end('seed')
+
+    def _capture_frame(self):
+        if not self.video_recorder.functional:
+            return
+        start = metrics_module.clock()
+        self.video_recorder.capture_frame()
+        duration = metrics_module.clock() - start
+        self._video_seconds += duration
+        if self.latency is not None:
+            self.latency.capture_frame.record(duration)
 
     def _close_video_recorder(self):
+        if not self.video_recorder.functional:
+            self.video_recorder.close()
+            return
+        start = metrics_module.clock()
         self.video_recorder.close()
-        if self.video_recorder.functional:
-            self.videos.append((self.video_recorder.path, self.video_recorder.metadata_path))
+        self._video_seconds += metrics_module.clock() - start
+        self.videos.append((self.video_recorder.path, self.video_recorder.metadata_path))
+        # Let adaptive schedules know what the video cost
+        if hasattr(self.video_callable, 'video_recorded'):
+            self.video_callable.video_recorded(self._video_seconds, self.video_recorder.frames_seen)
 
     def _video_enabled(self):
         return self.video_callable(self.episode_id)
@@ -272,15 +562,22 @@ class Monitor(object):
         # Make sure we've closed up shop when garbage collecting
         self.close()
 
-def load_results(training_dir):
+def load_results(training_dir, as_numpy=False, cache=False):
+    """Load and merge the results of all monitors that wrote to training_dir.
+
+    Args:
+        training_dir (str): The directory passed to 'monitor.start'.
+        as_numpy (bool): Return timestamps, episode_lengths and episode_rewards as numpy arrays rather than lists.
+        cache (bool): Cache the merged stats in the directory (see MERGED_STATS_CACHE), keyed by the sizes and mtimes of the stats files, so that loading unchanged results again is cheap. Off by default, so that reading results doesn't write to the directory.
+    """
     if not os.path.exists(training_dir):
         return
 
-    manifests = detect_training_manifests(training_dir)
+    manifests = read_manifests(training_dir)
     if not manifests:
         return
 
-    logger.debug('Uploading data from manifest %s', ', '.join(manifests))
+    logger.debug('Uploading data from manifest %s', ', '.join(path for path, _ in manifests))
 
     # Load up stats + video files
     stats_files = []
@@ -289,27 +586,29 @@ def load_results(training_dir):
     seeds = []
     env_infos = []
 
-    for manifest in manifests:
-        with open(manifest) as f:
-            contents = json.load(f)
-            # Make these paths absolute again
-            stats_files.append(os.path.join(training_dir, contents['stats']))
-            videos += [(os.path.join(training_dir, v), os.path.join(training_dir, m))
-                       for v, m in contents['videos']]
-            env_infos.append(contents['env_info'])
-            current_seeds = contents.get('seeds', [])
-            seeds += current_seeds
-            if current_seeds:
-                main_seeds.append(current_seeds[0])
-            else:
-                # current_seeds could be None or []
-                main_seeds.append(None)
+    for _, contents in manifests:
+        # Make these paths absolute again
+        stats_files.append(manifest_stats_file(training_dir, contents))
+        videos += [(os.path.join(training_dir, v), os.path.join(training_dir, m))
+                   for v, m in contents['videos']]
+        env_infos.append(contents['env_info'])
+        current_seeds = contents.get('seeds', [])
+        seeds += current_seeds or []
+        if 'main_seeds' in contents:
+            # A compacted manifest, standing in for several monitors
+            main_seeds += contents['main_seeds']
+        elif current_seeds:
+            main_seeds.append(current_seeds[0])
+        else:
+            # current_seeds could be None or []
+            main_seeds.append(None)
 
     env_info = collapse_env_infos(env_infos, training_dir)
-    timestamps, episode_lengths, episode_rewards, initial_reset_timestamp = merge_stats_files(stats_files)
+    cache_path = os.path.join(training_dir, MERGED_STATS_CACHE) if cache else None
+    timestamps, episode_lengths, episode_rewards, initial_reset_timestamp = merge_stats_files(stats_files, as_numpy=as_numpy, cache_path=cache_path)
 
     return {
-        'manifests': manifests,
+        'manifests': [path for path, _ in manifests],
         'env_info': env_info,
         'timestamps': timestamps,
         'episode_lengths': episode_lengths,
@@ -320,26 +619,94 @@ def load_results(training_dir):
         'seeds': seeds,
     }
 
-def merge_stats_files(stats_files):
-    timestamps = []
-    episode_lengths = []
-    episode_rewards = []
-    initial_reset_timestamps = []
+def load_step_stats(training_dir, mmap=True):
+    """Load the per-step stats recorded by monitors started with
+    step_stats=True.
 
+    Returns:
+        A list with one structured array per monitor, with 'episode', 'action', 'reward' and 'duration' fields. With mmap=True, a monitor whose steps fit in a single chunk is memory-mapped rather than read.
+    """
+    results = []
+    for _, contents in sorted(read_manifests(training_dir)):
+        # Compacted manifests hold the chunks of several monitors
+        for names in contents.get('step_stats_groups', [contents.get('step_stats', [])]):
+            paths = [os.path.join(training_dir, name) for name in names]
+            if not paths:
+                continue
+            chunks = step_recorder.load_chunks(paths, mmap=mmap)
+            results.append(chunks[0] if len(chunks) == 1 else np.concatenate(chunks))
+    return results
+
+def merge_stats_files(stats_files, as_numpy=False, cache_path=None):
+    """Merge per-monitor stats files into a single time-ordered series.
+
+    Each file is already sorted by timestamp, so we stream them through
+    a k-way heap merge rather than concatenating and sorting. If
+    cache_path is given, the result is cached there as an .npz file.
+    """
+    key = None
+    if cache_path is not None:
+        key = _stats_files_key(stats_files)
+        merged = _read_merged_stats_cache(cache_path, key)
+        if merged is not None:
+            return _merged_result(merged, as_numpy)
+
+    initial_reset_timestamps = []
+    sources = []
     for path in stats_files:
-        with open(path) as f:
-            content = json.load(f)
-            timestamps += content['timestamps']
-            episode_lengths += content['episode_lengths']
-            episode_rewards += content['episode_rewards']
-            initial_reset_timestamps.append(content['initial_reset_timestamp'])
-
-    idxs = np.argsort(timestamps)
-    timestamps = np.array(timestamps)[idxs].tolist()
-    episode_lengths = np.array(episode_lengths)[idxs].tolist()
-    episode_rewards = np.array(episode_rewards)[idxs].tolist()
-    initial_reset_timestamp = min(initial_reset_timestamps)
-    return timestamps, episode_lengths, episode_rewards, initial_reset_timestamp
+        initial_reset_timestamp, episodes = stats_recorder.iter_stats(path)
+        if initial_reset_timestamp is not None:
+            initial_reset_timestamps.append(initial_reset_timestamp)
+        sources.append(episodes)
+
+    timestamps = array.array('d')
+    episode_lengths = array.array('d')
+    episode_rewards = array.array('d')
+    for timestamp, length, reward in heapq.merge(*sources):
+        timestamps.append(timestamp)
+        episode_lengths.append(length)
+        episode_rewards.append(reward)
+
+    merged = {
+        'timestamps': np.frombuffer(timestamps, dtype='float64'),
+        'episode_lengths': np.frombuffer(episode_lengths, dtype='float64').astype('int64'),
+        'episode_rewards': np.frombuffer(episode_rewards, dtype='float64'),
+        'initial_reset_timestamp': min(initial_reset_timestamps) if initial_reset_timestamps else None,
+    }
+
+    if cache_path is not None:
+        try:
+            stats_recorder.save_columnar(cache_path, key=np.array(key), **merged)
+        except (IOError, OSError) as e:
+            # e.g. a read-only training directory
+            logger.debug('Could not cache merged stats to %s: %s', cache_path, e)
+
+    return _merged_result(merged, as_numpy)
+
+def _merged_result(merged, as_numpy):
+    columns = [merged['timestamps'], merged['episode_lengths'], merged['episode_rewards']]
+    if not as_numpy:
+        columns = [column.tolist() for column in columns]
+    return columns[0], columns[1], columns[2], merged['initial_reset_timestamp']
+
+def _stats_files_key(stats_files):
+    key = []
+    for path in sorted(stats_files):
+        stat = os.stat(path)
+        key.append([os.path.basename(path), stat.st_size, stat.st_mtime])
+    return json.dumps(key)
+
+def _read_merged_stats_cache(cache_path, key):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        merged = stats_recorder.load_columnar(cache_path)
+    except Exception as e:
+        logger.debug('Ignoring unreadable merged stats cache %s: %s', cache_path, e)
+        return None
+    if merged.get('key') is None or str(merged['key']) != key:
+        return None
+    return merged
 
 def collapse_env_infos(env_infos, training_dir):
     assert len(env_infos) > 0
@@ -0,0 +1,215 @@
+import bisect
+import heapq
+import json
+import logging
+import os
+
+from gym.monitoring import monitor, stats_recorder
+
+logger = logging.getLogger(__name__)
+
+class _Source(object):
+    """Read state for one monitor's stats file."""
+
+    def __init__(self, path):
+        self.path = path
+        # For logs: bytes consumed so far. For snapshots: episodes seen.
+        self.offset = 0
+        # Episodes at the start of the file that were already read from
+        # another source
+        self.skip = 0
+        self.stat = None
+
+class ResultsReader(object):
+    """Incrementally reads the episode stats in a monitor directory, for
+    live plots and dashboards.
+
+    Each call to update only reads what has been written since the last
+    one: unchanged manifests and stats files are skipped based on their
+    size and mtime, and stats logs are read from where we left off. So
+    the cost of an update depends on the number of files and new
+    episodes, not on the total number of episodes. The merged episodes
+    are kept sorted by timestamp, as in load_results. A new monitor's
+    episodes show up once its first manifest has been committed, within
+    a second of its first flush.
+
+    Example:
+
+        reader = ResultsReader('/tmp/cartpole-experiment-1')
+        while training:
+            if reader.update():
+                plot(reader.episode_rewards)
+    """
+
+    def __init__(self, training_dir):
+        self.training_dir = training_dir
+        self.reset()
+
+    def reset(self):
+        """Forget everything read so far."""
+        self.timestamps = []
+        self.episode_lengths = []
+        self.episode_rewards = []
+        self.initial_reset_timestamp = None
+        # manifest path -> (stat key, stats path, compacted sources)
+        self._manifests = {}
+        # stats path -> _Source
+        self._sources = {}
+        # Manifests we read from which have since been removed
+        self._removed = set()
+
+    def update(self):
+        """Ingest new episodes. Returns the number of new episodes."""
+        if not os.path.exists(self.training_dir):
+            return 0
+
+        if not self._update_manifests():
+            # Monitors we've read from were compacted into another file
+            logger.info('Monitors were compacted; rereading %s', self.training_dir)
+            self.reset()
+            return self.update()
+
+        batches = []
+        for source in list(self._sources.values()):
+            try:
+                episodes = self._read_source(source)
+            except _Truncated:
+                # A stats file went backwards, e.g. because the
+                # directory was cleared with force=True. Start over.
+                logger.info('Stats file %s was truncated; rereading %s', source.path, self.training_dir)
+                self.reset()
+                return self.update()
+            if episodes:
+                batches.append(episodes)
+        return self._ingest(batches)
+
+    def _update_manifests(self):
+        """Returns False if we need to start over."""
+        manifests = set(monitor.detect_training_manifests(self.training_dir))
+        for manifest in set(self._manifests) - manifests:
+            _, path, _ = self._manifests.pop(manifest)
+            source = self._sources.pop(path, None)
+            if source is not None and source.stat is not None:
+                self._removed.add(os.path.basename(manifest))
+        for manifest in manifests:
+            self._read_manifest(manifest)
+
+        # Skip monitors merged into a compacted manifest, unless we've
+        # already read some of their episodes.
+        superseded = set()
+        for _, _, sources in self._manifests.values():
+            superseded.update(sources)
+        if superseded & self._removed:
+            return False
+        for manifest, (_, path, _) in self._manifests.items():
+            if os.path.basename(manifest) in superseded:
+                source = self._sources.pop(path, None)
+                if source is not None and source.stat is not None:
+                    return False
+        return True
+
+    def _read_manifest(self, manifest):
+        try:
+            stat = _stat_key(manifest)
+        except OSError:
+            # Removed since we listed the directory
+            self._manifests.pop(manifest, None)
+            return
+        if manifest in self._manifests and self._manifests[manifest][0] == stat:
+            return
+
+        try:
+            with open(manifest) as f:
+                contents = json.load(f)
+        except (IOError, OSError):
+            self._manifests.pop(manifest, None)
+            return
+        path = monitor.manifest_stats_file(self.training_dir, contents)
+
+        previous = self._manifests.get(manifest)
+        if previous is not None and previous[1] != path:
+            # Switched from the snapshot to the log. Skip the episodes
+            # we already took from the snapshot.
+            snapshot = self._sources.pop(previous[1], None)
+            source = _Source(path)
+            if snapshot is not None:
+                source.skip = snapshot.offset
+            self._sources[path] = source
+        elif path not in self._sources:
+            self._sources[path] = _Source(path)
+        self._manifests[manifest] = (stat, path, contents.get('compacted_sources', []))
+
+    def _read_source(self, source):
+        try:
+            stat = _stat_key(source.path)
+        except OSError:
+            return []
+        if stat == source.stat:
+            return []
+        if source.stat is not None and stat[0] < source.stat[0]:
+            raise _Truncated()
+        source.stat = stat
+
+        if source.path.endswith('.jsonl'):
+            episodes = self._read_log(source)
+        else:
+            initial_reset_timestamp, episodes = stats_recorder.iter_stats(source.path)
+            self._add_initial_reset_timestamp(initial_reset_timestamp)
+            episodes = list(episodes)[source.offset:]
+            source.offset += len(episodes)
+
+        if source.skip:
+            skip = source.skip
+            source.skip = max(0, skip - len(episodes))
+            episodes = episodes[skip:]
+        return episodes
+
+    def _read_log(self, source):
+        with open(source.path, 'rb') as f:
+            f.seek(source.offset)
+            data = f.read()
+        # Leave any partially written line for next time
+        end = data.rfind(b'\n') + 1
+        source.offset += end
+
+        episodes = []
+        for line in data[:end].decode('utf-8').splitlines():
+            record = json.loads(line)
+            if isinstance(record, dict):
+                self._add_initial_reset_timestamp(record['initial_reset_timestamp'])
+            else:
+                episodes.append(tuple(record))
+        return episodes
+
+    def _add_initial_reset_timestamp(self, timestamp):
+        if timestamp is not None and (self.initial_reset_timestamp is None or timestamp < self.initial_reset_timestamp):
+            self.initial_reset_timestamp = timestamp
+
+    def _ingest(self, batches):
+        count = sum(len(batch) for batch in batches)
+        if count == 0:
+            return 0
+        new = list(heapq.merge(*batches))
+
+        # New episodes are usually later than everything we have, but
+        # a slow worker may flush late, so merge in anything earlier.
+        position = bisect.bisect_right(self.timestamps, new[0][0])
+        if position < len(self.timestamps):
+            tail = zip(self.timestamps[position:], self.episode_lengths[position:], self.episode_rewards[position:])
+            new = list(heapq.merge(tail, new))
+            del self.timestamps[position:]
+            del self.episode_lengths[position:]
+            del self.episode_rewards[position:]
+
+        for timestamp, length, reward in new:
+            self.timestamps.append(timestamp)
+            self.episode_lengths.append(length)
+            self.episode_rewards.append(reward)
+        return count
+
+class _Truncated(Exception):
+    pass
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime)
@@ -1,18 +1,45 @@
+import array
+import itertools
 import json
 import os
+import threading
 import time
 
+import numpy as np
+
 from gym import error
 from gym.utils import atomic_write
 
 class StatsRecorder(object):
+    """Records per-episode statistics.
+
+    Completed episodes are appended to a JSON Lines log
+    ('<prefix>.stats.jsonl'), so flushing costs O(1) per new episode
+    rather than rewriting everything recorded so far. The first line of
+    the log holds the initial reset timestamp; every following line is
+    one episode, as [timestamp, episode_length, episode_reward].
+
+    Only episodes which haven't been flushed yet are kept in memory, in
+    typed arrays. Once in the log, they are dropped. The timestamps,
+    episode_lengths and episode_rewards properties still list every
+    episode recorded, but they read the log to do so, so they cost
+    O(episodes) per access. Rewards are stored as doubles, so integer
+    rewards come back as floats.
+
+    The classic single-document format ('<prefix>.stats.json') is still
+    written as a snapshot whenever the number of episodes has doubled
+    since the last snapshot, and on close, so that older readers keep
+    working. Snapshots are built by streaming the log, and are batched
+    with other monitors' writes (see group_commit_write), so they can
+    lag the log by a moment; close waits for the last one. load_stats
+    reads either format.
+    """
+
     def __init__(self, directory, file_prefix):
         self.initial_reset_timestamp = None
         self.directory = directory
         self.file_prefix = file_prefix
-        self.episode_lengths = []
-        self.episode_rewards = []
-        self.timestamps = []
+        self.episode_count = 0
         self.steps = None
         self.rewards = None
 
@@ -21,6 +48,36 @@ class StatsRecorder(object):
 
         filename = '{}.stats.json'.format(self.file_prefix)
         self.path = os.path.join(self.directory, filename)
+        log_filename = '{}.stats.jsonl'.format(self.file_prefix)
+        self.log_path = os.path.join(self.directory, log_filename)
+
+        self._log = None
+        self._header_written = False
+        # Episodes not yet appended to the log. The monitor may flush
+        # from a background thread, so they're swapped out under a lock.
+        self._pending = EpisodeChunk()
+        self._pending_lock = threading.Lock()
+        # Held while flushing, so episodes are never in neither place
+        self._log_lock = threading.Lock()
+        self._snapshot_episodes = 0
+        self._snapshot_written = False
+
+    @property
+    def timestamps(self):
+        return self._columns()[0]
+
+    @property
+    def episode_lengths(self):
+        return self._columns()[1]
+
+    @property
+    def episode_rewards(self):
+        return self._columns()[2]
+
+    def _columns(self):
+        with self._log_lock, self._pending_lock:
+            episodes = list(self._logged_episodes()) + list(self._pending.episodes())
+        return [list(column) for column in zip(*episodes)] or [[], [], []]
 
     def before_step(self, action):
         assert not self.closed
@@ -50,23 +107,162 @@ class StatsRecorder(object):
 
     def save_complete(self):
         if self.steps is not None:
-            self.episode_lengths.append(self.steps)
-            self.episode_rewards.append(self.rewards)
-            self.timestamps.append(time.time())
+            with self._pending_lock:
+                self._pending.append(time.time(), self.steps, self.rewards)
+                self.episode_count += 1
 
-    def close(self):
+    def close(self, fsync=False):
         self.save_complete()
-        self.flush()
+        self.flush(fsync=fsync)
+        self.write_snapshot(fsync=fsync)
+        atomic_write.group_commit_flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
         self.closed = True
 
-    def flush(self):
+    def flush(self, fsync=False):
         if self.closed:
             return
 
-        with atomic_write.atomic_write(self.path) as f:
-            json.dump({
-                'initial_reset_timestamp': self.initial_reset_timestamp,
-                'timestamps': self.timestamps,
-                'episode_lengths': self.episode_lengths,
-                'episode_rewards': self.episode_rewards,
-            }, f)
+        with self._log_lock:
+            self._append_pending(fsync)
+
+        # Doubling keeps the total cost of snapshots linear in the
+        # number of episodes. The manifest names the snapshot, so it
+        # must exist from the first flush, even if it's empty.
+        if not self._snapshot_written or self.episode_count >= max(1, 2 * self._snapshot_episodes):
+            self.write_snapshot(fsync=fsync)
+
+    def _append_pending(self, fsync):
+        with self._pending_lock:
+            pending, self._pending = self._pending, EpisodeChunk()
+        lines = []
+        if not self._header_written and self.initial_reset_timestamp is not None:
+            lines.append(json.dumps({'initial_reset_timestamp': self.initial_reset_timestamp}))
+            self._header_written = True
+        lines.extend(json.dumps(episode) for episode in pending.episodes())
+        if lines:
+            if self._log is None:
+                self._log = open(self.log_path, 'a')
+            self._log.write(''.join(line + '\n' for line in lines))
+            self._log.flush()
+            if fsync:
+                os.fsync(self._log.fileno())
+
+    def write_snapshot(self, fsync=False):
+        """Queue the snapshot to be written from the log, along with
+        other monitors' files (see group_commit_write). It covers
+        everything flushed by the time it's written."""
+        atomic_write.group_commit_write(self.path, self._write_snapshot, fsync=fsync)
+        self._snapshot_episodes = self.episode_count
+        self._snapshot_written = True
+
+    def _write_snapshot(self, f):
+        # Runs on whichever thread commits the batch. Keep the log from
+        # growing between passes, so the columns line up.
+        with self._log_lock:
+            f.write('{{"initial_reset_timestamp": {}'.format(json.dumps(self.initial_reset_timestamp)))
+            # One pass over the log per column, to avoid loading it all
+            for i, key in enumerate(['timestamps', 'episode_lengths', 'episode_rewards']):
+                f.write(', "{}": ['.format(key))
+                for j, episode in enumerate(self._logged_episodes()):
+                    if j > 0:
+                        f.write(', ')
+                    f.write(json.dumps(episode[i]))
+                f.write(']')
+            f.write('}')
+
+    def _logged_episodes(self):
+        if not os.path.exists(self.log_path):
+            return iter([])
+        _, episodes = iter_stats(self.log_path)
+        return episodes
+
+class EpisodeChunk(object):
+    """Compact storage for a batch of completed episodes."""
+
+    def __init__(self):
+        self.timestamps = array.array('d')
+        self.episode_lengths = array.array('l')
+        self.episode_rewards = array.array('d')
+
+    def append(self, timestamp, length, reward):
+        self.timestamps.append(timestamp)
+        self.episode_lengths.append(length)
+        self.episode_rewards.append(reward)
+
+    def episodes(self):
+        return zip(self.timestamps, self.episode_lengths, self.episode_rewards)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+def _read_log(path):
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A partially written final line, e.g. if the process
+                # crashed mid-append.
+                return
+
+def iter_stats(path):
+    """Open a stats file in any of the supported formats: the log
+    (.jsonl), the snapshot (.json) or the columnar format (.npz).
+
+    Returns:
+        (initial_reset_timestamp, episodes), where episodes iterates
+        over (timestamp, episode_length, episode_reward) tuples in the
+        order they were recorded. For logs, episodes are read lazily.
+    """
+    if path.endswith('.jsonl'):
+        records = _read_log(path)
+        first = next(records, None)
+        if isinstance(first, dict):
+            initial_reset_timestamp = first['initial_reset_timestamp']
+        else:
+            initial_reset_timestamp = None
+            if first is not None:
+                records = itertools.chain([first], records)
+        return initial_reset_timestamp, (tuple(record) for record in records)
+    elif path.endswith('.npz'):
+        content = load_columnar(path)
+        return content['initial_reset_timestamp'], zip(content['timestamps'].tolist(), content['episode_lengths'].tolist(), content['episode_rewards'].tolist())
+    else:
+        with open(path) as f:
+            content = json.load(f)
+        return content['initial_reset_timestamp'], zip(content['timestamps'], content['episode_lengths'], content['episode_rewards'])
+
+def load_stats(path):
+    """Load a stats file in any supported format (see iter_stats) as a
+    dict with 'initial_reset_timestamp', 'timestamps', 'episode_lengths'
+    and 'episode_rewards'."""
+    initial_reset_timestamp, episodes = iter_stats(path)
+    columns = list(zip(*episodes)) or [(), (), ()]
+    return {
+        'initial_reset_timestamp': initial_reset_timestamp,
+        'timestamps': list(columns[0]),
+        'episode_lengths': list(columns[1]),
+        'episode_rewards': list(columns[2]),
+    }
+
+def save_columnar(path, timestamps, episode_lengths, episode_rewards, initial_reset_timestamp, **extra):
+    """Atomically write stats as numpy columns in an .npz file. Any
+    `extra` keyword arguments are stored alongside them."""
+    with atomic_write.atomic_write(path, binary=True) as f:
+        np.savez(f,
+                 timestamps=np.asarray(timestamps, dtype='float64'),
+                 episode_lengths=np.asarray(episode_lengths, dtype='int64'),
+                 episode_rewards=np.asarray(episode_rewards, dtype='float64'),
+                 # NaN stands in for None
+                 initial_reset_timestamp=np.float64(np.nan if initial_reset_timestamp is None else initial_reset_timestamp),
+                 **extra)
+
+def load_columnar(path):
+    with np.load(path) as data:
+        content = {key: data[key] for key in data.files}
+    initial_reset_timestamp = float(content['initial_reset_timestamp'])
+    content['initial_reset_timestamp'] = None if np.isnan(initial_reset_timestamp) else initial_reset_timestamp
+    return content
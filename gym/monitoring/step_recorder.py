@@ -0,0 +1,145 @@
+import os
+import struct
+import threading
+
+import numpy as np
+
+from gym import error
+
+# The .npy header of a chunk is padded to this many bytes, so that it
+# can be rewritten in place as the chunk grows.
+HEADER_SIZE = 256
+
+class StepRecorder(object):
+    """Records per-step statistics: the episode, action, reward and the
+    wall-clock duration of each step.
+
+    Steps are written into fixed-dtype numpy columns preallocated for
+    `chunk_size` steps, so recording a step is a handful of array
+    assignments. Each chunk is written to '<prefix>.steps.<chunk>.npy'.
+    Flushing only appends the steps recorded since the last flush to
+    the current chunk's file, and then updates the length in its
+    header, so every step is written once however often the monitor
+    flushes. Once a chunk fills up, the buffer is reused from the
+    start for the next one. Chunks are plain structured arrays, so
+    they can be opened with np.load(path, mmap_mode='r') (see
+    load_chunks).
+
+    Actions are stored with the dtype and shape of the first action
+    recorded, so the action space must produce uniform actions.
+    """
+
+    def __init__(self, directory, file_prefix, chunk_size=65536):
+        self.directory = directory
+        self.file_prefix = file_prefix
+        self.chunk_size = chunk_size
+        self.chunks = []
+
+        self._episode = np.full(chunk_size, -1, dtype='int64')
+        self._reward = np.zeros(chunk_size, dtype='float64')
+        self._duration = np.zeros(chunk_size, dtype='float64')
+        # Allocated once we know what actions look like
+        self._action = None
+        self.dtype = None
+        self._current_episode = -1
+        self._n = 0
+        self._chunk = 0
+        # Open file for the current chunk, and the steps already in it
+        self._file = None
+        self._written = 0
+        # Guards the buffer between spilling here and flushing from a
+        # background thread. Only taken once per chunk while recording.
+        self._lock = threading.Lock()
+
+    def start_episode(self, episode):
+        self._current_episode = episode
+
+    def record(self, action, reward, duration):
+        if self._action is None:
+            self._allocate(action)
+        i = self._n
+        self._episode[i] = self._current_episode
+        self._action[i] = action
+        self._reward[i] = reward
+        self._duration[i] = duration
+        self._n = i + 1
+        if self._n == self.chunk_size:
+            self._spill()
+
+    def _allocate(self, action):
+        action = np.asarray(action)
+        if action.dtype == object:
+            raise error.Error('Cannot record per-step stats for non-numeric action {!r}'.format(action))
+        self._action = np.zeros((self.chunk_size,) + action.shape, dtype=action.dtype)
+        self.dtype = np.dtype([
+            ('episode', 'int64'),
+            ('action', self._action.dtype, self._action.shape[1:]),
+            ('reward', 'float64'),
+            ('duration', 'float64'),
+        ])
+        # Building headers is slow enough to matter when flushing on
+        # every reset, so do the expensive part once
+        self._descr = repr(np.lib.format.dtype_to_descr(self.dtype))
+
+    def _spill(self):
+        with self._lock:
+            self._append(self._n)
+            self._file.close()
+            self._file = None
+            self._written = 0
+            self._chunk += 1
+            self._n = 0
+
+    def flush(self, fsync=False):
+        """Write out the steps recorded since the last flush."""
+        with self._lock:
+            if self._n > self._written:
+                self._append(self._n, fsync=fsync)
+
+    def _append(self, n, fsync=False):
+        if self._file is None:
+            path = os.path.join(self.directory, '{}.steps.{:06}.npy'.format(self.file_prefix, self._chunk))
+            self._file = open(path, 'wb')
+            self._file.write(_header(self._descr, 0))
+            self.chunks.append(path)
+
+        rows = np.empty(n - self._written, dtype=self.dtype)
+        rows['episode'] = self._episode[self._written:n]
+        rows['action'] = self._action[self._written:n]
+        rows['reward'] = self._reward[self._written:n]
+        rows['duration'] = self._duration[self._written:n]
+        self._file.write(rows.tobytes())
+        self._file.flush()
+        # Only count the new steps once they're on disk, so readers
+        # never see a length longer than the data.
+        self._file.seek(0)
+        self._file.write(_header(self._descr, n))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+        self._written = n
+
+    def close(self, fsync=False):
+        self.flush(fsync=fsync)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+_NPY_PREFIX = b'\x93NUMPY\x01\x00'
+
+def _header(descr, length):
+    """A version 1.0 .npy header for `length` rows of the dtype with the
+    given repr'd descr, padded to HEADER_SIZE bytes."""
+    header = "{{'descr': {}, 'fortran_order': False, 'shape': ({},), }}".format(descr, length)
+    padding = HEADER_SIZE - len(_NPY_PREFIX) - 2 - len(header) - 1
+    if padding < 0:
+        raise error.Error('Step stats dtype {} is too large for the chunk header'.format(descr))
+    header = (header + ' ' * padding + '\n').encode('latin1')
+    return _NPY_PREFIX + struct.pack('<H', len(header)) + header
+
+def load_chunks(paths, mmap=True):
+    """Open step chunks written by a StepRecorder, in order. With
+    mmap=True the chunks are memory-mapped rather than read."""
+    return [np.load(path, mmap_mode='r' if mmap else None) for path in paths]
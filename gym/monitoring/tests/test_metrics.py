@@ -0,0 +1,22 @@
+from gym.monitoring import metrics
+
+def test_histogram_percentiles():
+    histogram = metrics.Histogram()
+    for i in range(1, 101):
+        histogram.record(i * 1e-3)
+    summary = histogram.summary()
+    assert summary['count'] == 100
+    assert summary['min'] == 1e-3
+    assert summary['max'] == 0.1
+    assert abs(summary['mean'] - 0.0505) < 1e-9
+    # Percentiles are accurate to within a bucket (~19%)
+    assert 0.050 <= summary['p50'] <= 0.050 * 1.2
+    assert 0.099 <= summary['p99'] <= 0.1
+
+def test_histogram_extremes():
+    histogram = metrics.Histogram()
+    histogram.record(0)
+    histogram.record(1e6)
+    assert sum(histogram.counts) == 2
+    assert histogram.percentile(100) == 1e6
+    assert metrics.Histogram().summary() == {'count': 0}
@@ -1,11 +1,21 @@
 import glob
+import json
 import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import mock
+import numpy as np
 
 import gym
 from gym import error
 from gym import monitoring
-from gym.monitoring import monitor
+from gym.monitoring import compact, monitor, step_recorder
 from gym.monitoring.tests import helpers
+from gym.utils import atomic_write
 
 class FakeEnv(gym.Env):
     def _render(self, close=True):
@@ -71,3 +81,452 @@ def test_env_reuse():
 
         results = monitor.load_results(temp)
         assert results['episode_lengths'] == [2], 'Results: {}'.format(results)
+
+def test_stats_log_readable_before_close():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False)
+        for _ in range(5):
+            env.reset()
+            env.step(1)
+        # The last reset flushed 4 completed episodes into the log. (The
+        # manifest which points at it is only queued until committed.)
+        atomic_write.group_commit_flush()
+        results = monitoring.load_results(temp)
+        assert results['episode_lengths'] == [1] * 4
+        assert results['episode_rewards'] == [1] * 4
+        env.monitor.close()
+
+        results = monitoring.load_results(temp)
+        assert results['episode_lengths'] == [1] * 5
+
+def test_legacy_stats_snapshot():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False)
+        env.reset()
+        env.step(1)
+        env.monitor.close()
+
+        # Older monitors only wrote the JSON snapshot
+        for path in glob.glob(os.path.join(temp, '*.stats.jsonl')):
+            os.remove(path)
+        results = monitoring.load_results(temp)
+        assert results['episode_lengths'] == [1]
+
+def test_flush_policy_every_n_episodes():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False, flush_policy=monitoring.FlushPolicy(episodes=3))
+        for _ in range(5):
+            env.reset()
+            env.step(1)
+        # Flushed after the third reset, which completed two episodes
+        atomic_write.group_commit_flush()
+        results = monitoring.load_results(temp)
+        assert results['episode_lengths'] == [1] * 2
+        env.monitor.close()
+        assert monitoring.load_results(temp)['episode_lengths'] == [1] * 5
+
+def test_flush_policy_on_close_only():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False, flush_policy=monitoring.FlushPolicy(episodes=None))
+        for _ in range(5):
+            env.reset()
+            env.step(1)
+        assert monitoring.load_results(temp) is None
+        env.monitor.close()
+        assert monitoring.load_results(temp)['episode_lengths'] == [1] * 5
+
+def test_flush_policy_background():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False, flush_policy=monitoring.FlushPolicy(seconds=0.01, background=True, fsync=True))
+        env.reset()
+        env.step(1)
+        env.reset()
+
+        # The flusher wakes up on its own every 10ms
+        for _ in range(100):
+            results = monitoring.load_results(temp)
+            if results and results['episode_lengths'] == [1]:
+                break
+            time.sleep(0.01)
+        else:
+            assert False, 'Background flush never happened: {}'.format(results)
+        env.monitor.close()
+        # Closing records the episode in progress too
+        assert monitoring.load_results(temp)['episode_lengths'] == [1, 0]
+
+def test_load_results_merges_monitors():
+    with helpers.tempdir() as temp:
+        envs = [gym.make('OneRoundDeterministicReward-v0') for _ in range(2)]
+        for env in envs:
+            env.monitor.start(temp, video_callable=False)
+        # Interleave the episodes of the two monitors
+        for i in range(6):
+            env = envs[i % 2]
+            env.reset()
+            env.step(i % 2)
+        for env in envs:
+            env.monitor.close()
+
+        results = monitoring.load_results(temp)
+        assert results['timestamps'] == sorted(results['timestamps'])
+        assert results['episode_lengths'] == [1] * 6
+
+def test_load_results_cache():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False)
+        for _ in range(3):
+            env.reset()
+            env.step(1)
+        env.monitor.close()
+
+        cache_path = os.path.join(temp, monitor.MERGED_STATS_CACHE)
+        # Readers don't write to the directory unless asked to
+        monitoring.load_results(temp)
+        assert not os.path.exists(cache_path)
+
+        results = monitoring.load_results(temp, cache=True)
+        assert os.path.exists(cache_path)
+        cached = monitoring.load_results(temp, as_numpy=True, cache=True)
+        assert cached['episode_rewards'].tolist() == results['episode_rewards']
+        assert cached['episode_lengths'].dtype.kind == 'i'
+        assert cached['initial_reset_timestamp'] == results['initial_reset_timestamp']
+
+def test_step_stats():
+    with helpers.tempdir() as temp:
+        env = gym.make('TwoRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False, step_stats=True)
+        for action in [0, 1, 1]:
+            env.reset()
+            env.step(action)
+            env.step(action)
+        env.monitor.close()
+
+        [steps] = monitoring.load_step_stats(temp)
+        assert steps['episode'].tolist() == [0, 0, 1, 1, 2, 2]
+        assert steps['action'].tolist() == [0, 0, 1, 1, 1, 1]
+        assert (steps['duration'] >= 0).all()
+
+def test_step_recorder_spills_chunks():
+    with helpers.tempdir() as temp:
+        recorder = monitoring.StepRecorder(temp, 'test', chunk_size=4)
+        for i in range(10):
+            if i % 3 == 0:
+                recorder.start_episode(i // 3)
+            recorder.record([i, -i], 1.0, 0.0)
+        recorder.close()
+
+        assert len(recorder.chunks) == 3
+        steps = np.concatenate(step_recorder.load_chunks(recorder.chunks))
+        assert steps['action'][:, 0].tolist() == list(range(10))
+        assert steps['episode'].tolist() == [0, 0, 0, 1, 1, 1, 2, 2, 2, 3]
+
+def test_step_recorder_flush_appends():
+    with helpers.tempdir() as temp:
+        recorder = monitoring.StepRecorder(temp, 'test', chunk_size=8)
+        recorder.start_episode(0)
+        for i in range(3):
+            recorder.record(i, 1.0, 0.0)
+        recorder.flush()
+        # The partial chunk is readable, and only grows as steps are added
+        size = os.path.getsize(recorder.chunks[0])
+        assert np.load(recorder.chunks[0], mmap_mode='r')['action'].tolist() == [0, 1, 2]
+        recorder.start_episode(1)
+        for i in range(3, 5):
+            recorder.record(i, 1.0, 0.0)
+        recorder.flush()
+        assert os.path.getsize(recorder.chunks[0]) == size + 2 * recorder.dtype.itemsize
+        recorder.close()
+
+        steps = np.load(recorder.chunks[0])
+        assert steps['action'].tolist() == list(range(5))
+        assert steps['episode'].tolist() == [0, 0, 0, 1, 1]
+
+def test_latency_metrics():
+    with helpers.tempdir() as temp:
+        env = gym.make('OneRoundDeterministicReward-v0')
+        monitor = env.monitor
+        assert monitor.metrics() is None
+        monitor.start(temp, video_callable=False, metrics=True)
+        for _ in range(3):
+            env.reset()
+            env.step(1)
+        monitor.close()
+
+        metrics = monitor.metrics()
+        assert metrics['step']['count'] == 3
+        assert metrics['reset']['count'] == 3
+        # Between each reset and step, and each step and reset
+        assert metrics['think']['count'] == 5
+        assert metrics['step']['min'] <= metrics['step']['p50'] <= metrics['step']['max']
+        # Video was disabled
+        assert metrics['capture_frame']['count'] == 0
+
+        [manifest] = glob.glob(os.path.join(temp, '*.manifest.json'))
+        with open(manifest) as f:
+            assert json.load(f)['metrics'] == metrics
+
+def test_trace():
+    with helpers.tempdir() as temp:
+        env = gym.make('FrozenLake-v0')
+        env.monitor.start(temp, video_callable=lambda episode_id: True, trace=True)
+        for _ in range(2):
+            env.reset()
+            env.step(0)
+        env.monitor.close()
+
+        output = os.path.join(temp, 'merged.json')
+        monitoring.merge_traces([temp], output)
+        with open(output) as f:
+            events = json.load(f)
+        names = set(event['name'] for event in events if event['ph'] == 'B')
+        assert names == set(['make', 'seed', 'reset', 'step', 'render', 'encoder_open', 'encoder_close', 'flush'])
+        # Every begin event has a matching end
+        assert sum(event['ph'] == 'B' for event in events) == sum(event['ph'] == 'E' for event in events)
+        assert all(event['args']['env_id'] == 'FrozenLake-v0' for event in events if event['ph'] == 'B')
+
+def test_restart_without_trace():
+    with helpers.tempdir() as temp:
+        env = gym.make('FrozenLake-v0')
+        env.monitor.start(temp, trace=True)
+        env.monitor.close()
+        env.monitor.start(temp, force=True)
+        assert env.monitor.tracer is None
+        env.reset()
+        env.monitor.close()
+
+def test_trace_events_from_many_threads():
+    with helpers.tempdir() as temp:
+        path = os.path.join(temp, 'trace.json')
+        tracer = monitoring.Tracer(path, pid=1)
+
+        def record():
+            for _ in range(5000):
+                tracer.begin('step')
+                tracer.end('step')
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        # Flush while the events are being recorded
+        while any(thread.is_alive() for thread in threads):
+            tracer.flush()
+        for thread in threads:
+            thread.join()
+        tracer.close()
+
+        with open(path) as f:
+            events = json.load(f)
+        assert sum(event['ph'] != 'M' for event in events) == 4 * 5000 * 2
+
+def test_time_budget_video_schedule():
+    schedule = monitoring.TimeBudgetVideoSchedule(budget=0.1)
+    with mock.patch('gym.monitoring.metrics.clock') as clock:
+        clock.return_value = 0.
+        # Always record the first episode, to measure the cost
+        assert schedule(0)
+        schedule.video_recorded(1., 100)
+        # Another video would take 2s of the first 10s
+        clock.return_value = 10.
+        assert not schedule(1)
+        clock.return_value = 20.
+        assert schedule(2)
+    assert schedule.seconds_per_frame == 0.01
+
+def test_time_budget_video_schedule_is_told_video_cost():
+    with helpers.tempdir() as temp:
+        schedule = monitoring.TimeBudgetVideoSchedule(budget=1)
+        env = gym.make('FrozenLake-v0')
+        env.monitor.start(temp, video_callable=schedule)
+        for _ in range(3):
+            env.reset()
+            env.step(0)
+        env.monitor.close()
+
+        assert schedule.videos == len(monitoring.load_results(temp)['videos']) >= 1
+        assert schedule.frames >= 2 * schedule.videos
+        assert schedule.seconds > 0
+
+def test_results_reader():
+    with helpers.tempdir() as temp:
+        reader = monitoring.ResultsReader(temp)
+        assert reader.update() == 0
+
+        env = gym.make('OneRoundDeterministicReward-v0')
+        env.monitor.start(temp, video_callable=False)
+        for _ in range(3):
+            env.reset()
+            env.step(1)
+        # The last reset flushed 2 completed episodes
+        atomic_write.group_commit_flush()
+        assert reader.update() == 2
+        assert reader.update() == 0
+
+        env.reset()
+        env.step(0)
+        env.monitor.close()
+        assert reader.update() == 2
+        assert reader.episode_rewards == [1, 1, 1, 0]
+
+        results = monitoring.load_results(temp)
+        assert reader.timestamps == results['timestamps']
+        assert reader.initial_reset_timestamp == results['initial_reset_timestamp']
+
+def test_results_reader_late_flush():
+    with helpers.tempdir() as temp:
+        reader = monitoring.ResultsReader(temp)
+        slow, fast = [gym.make('OneRoundDeterministicReward-v0') for _ in range(2)]
+        slow.monitor.start(temp, video_callable=False, flush_policy=monitoring.FlushPolicy(episodes=None))
+        fast.monitor.start(temp, video_callable=False)
+        for _ in range(3):
+            for env in [slow, fast]:
+                env.reset()
+                env.step(1)
+        fast.monitor.close()
+        assert reader.update() == 3
+        # The slow monitor's episodes are older than the fast one's last
+        slow.monitor.close()
+        assert reader.update() == 3
+
+        results = monitoring.load_results(temp)
+        assert reader.timestamps == results['timestamps']
+
+def test_compact():
+    with helpers.tempdir() as temp:
+        reader = monitoring.ResultsReader(temp)
+        envs = [gym.make('OneRoundDeterministicReward-v0') for _ in range(3)]
+        for env in envs:
+            env.monitor.start(temp, video_callable=False)
+        for i in range(3):
+            for env in envs:
+                env.seed(i)
+                env.reset()
+                env.step(1)
+        live = envs[2].monitor
+        live.flush(force=True)
+        live_manifest = glob.glob(os.path.join(temp, '*.manifest.{}.manifest.json'.format(live.file_infix)))[0]
+        for env in envs[:2]:
+            env.monitor.close()
+        # The live monitor's last episode isn't over until it resets
+        assert reader.update() == 8
+        before = monitoring.load_results(temp)
+
+        path = compact.compact(temp)
+        # The monitor which is still running is left alone
+        assert sorted(monitor.detect_training_manifests(temp)) == sorted([path, live_manifest])
+        assert len(glob.glob(os.path.join(temp, '*.stats.*'))) == 3
+        after = monitoring.load_results(temp)
+        for key in ['timestamps', 'episode_lengths', 'episode_rewards', 'initial_reset_timestamp', 'env_info']:
+            assert after[key] == before[key], key
+        assert len(after['main_seeds']) == len(before['main_seeds']) == 3
+        # The reader starts over once the monitors it read are compacted
+        assert reader.update() == 8
+        assert reader.timestamps == after['timestamps']
+
+        live.close()
+        path = compact.compact(temp)
+        assert monitor.detect_training_manifests(temp) == [path]
+        assert len(monitoring.load_results(temp)['timestamps']) == 9
+
+def test_monitor_writes_are_batched():
+    writer = atomic_write.GroupCommitWriter()
+    with helpers.tempdir() as temp, mock.patch.object(atomic_write, '_group_commit_writer', writer):
+        envs = [gym.make('CartPole-v0') for _ in range(2)]
+        for env in envs:
+            env.monitor.start(temp, video_callable=False)
+        # One after the other, on the same thread
+        for env in envs:
+            env.reset()
+            env.monitor.flush()
+        assert glob.glob(os.path.join(temp, '*.manifest.json')) == []
+
+        envs[0].monitor.flush(force=True)
+        # The manifests and stats snapshots of both monitors
+        assert writer.batches == 1
+        assert len(glob.glob(os.path.join(temp, '*.manifest.json'))) == 2
+        assert len(glob.glob(os.path.join(temp, '*.stats.json'))) == 2
+        for env in envs:
+            env.monitor.close()
+
+def test_flush_before_first_reset():
+    with helpers.tempdir() as temp:
+        env = gym.make('CartPole-v0')
+        env.monitor.start(temp, video_callable=False)
+        monitor = env.monitor
+        monitor.flush(force=True)
+        results = monitoring.load_results(temp)
+        assert results['episode_lengths'] == []
+        assert results['initial_reset_timestamp'] is None
+        monitor.close()
+
+def test_compact_after_crash():
+    with helpers.tempdir() as temp:
+        envs = [gym.make('OneRoundDeterministicReward-v0') for _ in range(2)]
+        for env in envs:
+            env.monitor.start(temp, video_callable=False)
+        for env in envs:
+            env.reset()
+            env.step(1)
+            env.monitor.close()
+        sources = monitor.detect_training_manifests(temp)
+
+        # Crash after writing the compacted manifest, before removing
+        # anything it replaces
+        with mock.patch.object(compact, '_remove', side_effect=KeyboardInterrupt):
+            try:
+                compact.compact(temp)
+            except KeyboardInterrupt:
+                pass
+            else:
+                assert False, 'Expected compaction to be interrupted'
+        [path] = [p for p in monitor.detect_training_manifests(temp) if p not in sources]
+        assert len(monitoring.load_results(temp)['timestamps']) == 2
+
+        # There's nothing more to compact, but the leftovers are removed
+        assert compact.compact(temp) is None
+        assert monitor.detect_training_manifests(temp) == [path]
+        assert len(glob.glob(os.path.join(temp, '*.stats.*'))) == 1
+        assert len(monitoring.load_results(temp)['timestamps']) == 2
+
+def test_compact_only_probes_local_processes():
+    # A process which has certainly exited
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    path = '{}.0.{}.manifest.json'.format(monitor.MANIFEST_PREFIX, process.pid)
+
+    assert not compact._is_live(path, {'hostname': socket.gethostname()})
+    # Its pid means nothing on another host, or if we don't know the host
+    assert compact._is_live(path, {'hostname': 'elsewhere'})
+    assert compact._is_live(path, {})
+    assert not compact._is_live(path, {'hostname': 'elsewhere', 'closed': True})
+
+def test_stats_recorder_drops_flushed_episodes():
+    with helpers.tempdir() as temp:
+        recorder = monitoring.StatsRecorder(temp, 'test')
+        for reward in range(5):
+            recorder.before_reset()
+            recorder.after_reset(None)
+            recorder.before_step(0)
+            recorder.after_step(None, reward, True, {})
+        # Unflushed episodes are listed too
+        assert recorder.episode_rewards == [0., 1., 2., 3.]
+        recorder.flush()
+        # The first 4 episodes are in the log, not in memory
+        assert recorder.episode_count == 4
+        assert len(recorder._pending) == 0
+        # ...but are still listed
+        assert recorder.episode_rewards == [0., 1., 2., 3.]
+        recorder.close()
+        assert recorder.episode_rewards == [0., 1., 2., 3., 4.]
+        assert recorder.episode_lengths == [1] * 5
+        assert len(recorder.timestamps) == 5
+
+        with open(recorder.path) as f:
+            snapshot = json.load(f)
+        assert snapshot['episode_rewards'] == [0, 1, 2, 3, 4]
+        assert snapshot['episode_lengths'] == [1] * 5
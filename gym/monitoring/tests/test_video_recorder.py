@@ -2,12 +2,16 @@ import json
 import os
 import shutil
 import tempfile
+import threading
 
+import mock
 import numpy as np
 from nose2 import tools
 
 import gym
-from gym.monitoring import VideoRecorder
+from gym import error
+from gym.monitoring import VideoRecorder, video_recorder
+from gym.monitoring.video_recorder import FrameWriter
 
 class BrokenRecordableEnv(object):
     metadata = {'render.modes': [None, 'rgb_array']}
@@ -65,3 +69,113 @@ def test_text_envs():
         video.close()
     finally:
         os.remove(video.path)
+
+class SlowStream(object):
+    """Stands in for a video encoder that blocks until released."""
+    def __init__(self):
+        self.released = threading.Event()
+        self.written = []
+
+    def write(self, data):
+        self.released.wait()
+        self.written.append(data)
+
+def test_frame_writer_drops_frames():
+    stream = SlowStream()
+    writer = FrameWriter(stream, queue_size=2, drop_frames=True)
+    # The writer thread picks up at most one frame, and two more fit in
+    # the queue, so at least 7 of these are dropped without blocking
+    for i in range(10):
+        writer.write(str(i))
+    stream.released.set()
+    writer.close()
+    assert writer.frames_dropped >= 7
+    assert len(stream.written) + writer.frames_dropped == 10
+    assert stream.written[0] == '0'
+
+def test_frame_writer_blocks():
+    stream = SlowStream()
+    stream.released.set()
+    writer = FrameWriter(stream, queue_size=1)
+    for i in range(10):
+        writer.write(str(i))
+    writer.close()
+    assert writer.frames_dropped == 0
+    assert stream.written == [str(i) for i in range(10)]
+
+def test_downscale_frame():
+    pixels = np.arange(2 * 4 * 3, dtype=np.uint8).reshape(2, 4, 3)
+    frame = pixels.repeat(2, axis=0).repeat(2, axis=1)
+    small = video_recorder.downscale_frame(frame, (4, 2))
+    assert small.dtype == np.uint8
+    assert small.tolist() == pixels.tolist()
+    # Frames which already fit are left alone
+    assert video_recorder.downscale_frame(frame, (640, 480)) is frame
+
+def test_downscale_frame_keeps_aspect_ratio():
+    # e.g. CarRacing, which isn't a whole multiple of the target
+    frame = np.full((400, 600, 3), 7, dtype=np.uint8)
+    small = video_recorder.downscale_frame(frame, (320, 240))
+    assert small.shape == (212, 320, 3)
+    assert (small == 7).all()
+
+    # Odd targets are rounded down to even dimensions for libx264
+    small = video_recorder.downscale_frame(frame, (301, 201))
+    assert small.shape == (200, 300, 3)
+    assert (small == 7).all()
+
+class CountingEnv(object):
+    metadata = {'render.modes': ['ansi'], 'video.frames_per_second': 30}
+
+    def __init__(self):
+        self.renders = 0
+
+    def render(self, mode=None):
+        self.renders += 1
+        return 'frame\n'
+
+def test_capture_every():
+    env = CountingEnv()
+    rec = VideoRecorder(env, capture_every=3)
+    try:
+        assert rec.frames_per_sec == 10
+        for _ in range(7):
+            rec.capture_frame()
+        assert env.renders == 3
+        rec.close()
+    finally:
+        os.remove(rec.path)
+
+def test_text_encoder():
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        path = f.name
+    try:
+        encoder = video_recorder.TextEncoder(path, 30)
+        encoder.capture_frame('abc\n')
+        encoder.capture_frame('a\nbcdef\n')
+        encoder.close()
+
+        with open(path) as f:
+            data = json.load(f)
+        assert data['version'] == 1
+        assert data['width'] == 7
+        assert data['height'] == 3
+        assert data['duration'] == 1.0
+        assert data['stdout'][1] == [0.5, '\x1b[2J\x1b[1;1Ha\r\nbcdef\r\n']
+    finally:
+        os.remove(path)
+
+def test_unknown_encoder_option():
+    try:
+        video_recorder.ImageEncoder('/tmp/unused.mp4', (2, 2, 3), 30, encoder_options={'bitrate': 100})
+    except error.Error:
+        pass
+    else:
+        assert False, 'Expected an error for an unknown encoder option'
+
+def test_encoder_version_is_cached():
+    with mock.patch('subprocess.check_output', return_value=b'fake version') as check_output:
+        video_recorder._encoder_versions.pop('fakeffmpeg', None)
+        assert video_recorder.encoder_version('fakeffmpeg') == str(b'fake version')
+        assert video_recorder.encoder_version('fakeffmpeg') == str(b'fake version')
+        assert check_output.call_count == 1
@@ -0,0 +1,147 @@
+"""Event traces of the environment lifecycle, in the Chrome trace format.
+
+A monitor started with trace=True writes begin/end events for make,
+seed, reset, step, render, video encoder open/close and stats flushes
+to '<prefix>.trace.<monitor id>.<pid>.json' in the monitor directory.
+Events appear on the row of the thread that recorded them, and are
+tagged with the env id, monitor id and file infix.
+
+Merge the traces of many workers into one timeline, viewable in
+chrome://tracing or https://ui.perfetto.dev, with:
+
+    python -m gym.monitoring.trace_merge merged.json /path/to/training_dir ...
+"""
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+FILE_PREFIX = 'openaigym'
+
+# Buffered events are written out at least this often
+MAX_BUFFERED_EVENTS = 10000
+
+class Tracer(object):
+    """Records trace events for one monitor.
+
+    Files use the JSON Array Format, one event per line. The closing
+    bracket is optional in that format, so the file is always viewable,
+    even if the process dies. Timestamps are wall-clock, so that traces
+    from different machines can be lined up.
+
+    Args:
+        path (str): The trace file to write.
+        pid (int): The process to attribute events to.
+        args (dict): Tags (e.g. env id) added to every begin event.
+    """
+
+    def __init__(self, path, pid, args=None):
+        self.path = path
+        self.pid = pid
+        self.args = args or {}
+        self.closed = False
+        self._events = []
+        self._thread_names = {}
+        self._written = 0
+        # Flushes may come from the monitor's background flusher
+        self._lock = threading.Lock()
+        # Held briefly to add to or take the buffered events
+        self._buffer_lock = threading.Lock()
+
+        self._file = open(path, 'w')
+        self._file.write('[')
+
+    def begin(self, name, timestamp=None):
+        self._record('B', name, timestamp)
+
+    def end(self, name, timestamp=None):
+        self._record('E', name, timestamp)
+
+    def _record(self, phase, name, timestamp):
+        thread = threading.current_thread()
+        with self._buffer_lock:
+            if thread.ident not in self._thread_names:
+                self._thread_names[thread.ident] = thread.name
+                self._events.append(('M', thread.name, None, thread.ident))
+            self._events.append((phase, name, time.time() if timestamp is None else timestamp, thread.ident))
+            full = len(self._events) >= MAX_BUFFERED_EVENTS
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self.closed:
+            return
+        # Swap rather than clear, so events can be recorded on other
+        # threads while we write.
+        with self._buffer_lock:
+            events, self._events = self._events, []
+        for phase, name, timestamp, tid in events:
+            if phase == 'M':
+                event = {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            else:
+                event = {'name': name, 'ph': phase, 'ts': int(timestamp * 1e6), 'pid': self.pid, 'tid': tid}
+                if phase == 'B':
+                    event['args'] = self.args
+            self._write_event(event)
+        self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self._flush()
+            self._file.write('\n]\n')
+            self._file.close()
+            self.closed = True
+
+    def _write_event(self, event):
+        if self._written > 0:
+            self._file.write(',')
+        self._file.write('\n' + json.dumps(event))
+        self._written += 1
+
+def read_trace(path):
+    """Yields the events in a trace file, skipping a partially written
+    final event."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip().rstrip(',')
+            if line in ('', '[', ']'):
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warn('Skipping malformed trace event in %s: %s', path, line)
+
+def detect_trace_files(directory):
+    return sorted(glob.glob(os.path.join(directory, '{}.trace.*.json'.format(FILE_PREFIX))))
+
+def merge_traces(paths, output_path):
+    """Combine trace files (or directories containing them) into a
+    single trace. Returns the number of events written."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += detect_trace_files(path)
+        else:
+            files.append(path)
+
+    count = 0
+    with open(output_path, 'w') as out:
+        out.write('[\n')
+        for path in files:
+            for event in read_trace(path):
+                if count > 0:
+                    out.write(',\n')
+                out.write(json.dumps(event))
+                count += 1
+        out.write('\n]\n')
+    return count
@@ -0,0 +1,26 @@
+"""Merge monitor trace files into a single Chrome trace.
+
+Usage:
+
+    python -m gym.monitoring.trace_merge merged.json /path/to/training_dir ...
+"""
+import argparse
+import logging
+import sys
+
+from gym.monitoring import trace
+
+logger = logging.getLogger(__name__)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m gym.monitoring.trace_merge', description='Merge monitor trace files into a single Chrome trace.')
+    parser.add_argument('output', help='The merged trace file to write')
+    parser.add_argument('inputs', nargs='+', help='Trace files, or monitor directories containing them')
+    args = parser.parse_args(argv)
+
+    count = trace.merge_traces(args.inputs, args.output)
+    logger.info('Wrote %d events to %s', count, args.output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
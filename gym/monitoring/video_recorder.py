@@ -3,12 +3,13 @@ import json
 import os
 import subprocess
 import tempfile
+import threading
 import os.path
-import distutils.spawn, distutils.version
 import numpy as np
 from six import StringIO
 import six
 import six.moves.urllib as urlparse
+from six.moves import queue
 
 from gym import error
 
@@ -32,9 +33,15 @@ class VideoRecorder(object):
         base_path (Optional[str]): Alternatively, path to the video file without extension, which will be added.
         metadata (Optional[dict]): Contents to save to the metadata file.
         enabled (bool): Whether to actually record video, or just no-op (for convenience)
+        frame_queue_size (int): How many frames may wait to be written to the encoder by a background thread (see FrameWriter). 0 writes frames synchronously.
+        drop_frames (bool): Drop frames rather than block when the frame queue is full. The number dropped is saved to the metadata as 'frames_dropped'.
+        capture_every (int): Only render and record every k-th frame. The video plays at the env's frames per second divided by k, so it keeps its original speed.
+        target_size (Optional[tuple]): Downscale frames to fit within (width, height), keeping their aspect ratio and even dimensions, before encoding them, averaging over the pixels each output pixel covers.
+        encoder_options (Optional[dict]): Settings for the video encoder, e.g. {'preset': 'ultrafast', 'crf': 28}. See ImageEncoder.
+        tracer (Optional[Tracer]): Records when the encoder is opened and closed.
     """
 
-    def __init__(self, env, path=None, metadata=None, enabled=True, base_path=None):
+    def __init__(self, env, path=None, metadata=None, enabled=True, base_path=None, frame_queue_size=64, drop_frames=False, capture_every=1, target_size=None, encoder_options=None, tracer=None):
         modes = env.metadata.get('render.modes', [])
         self.enabled = enabled
 
@@ -79,7 +86,17 @@ class VideoRecorder(object):
         # OS X, the file is precreated, but not on Linux.
         touch(path)
 
-        self.frames_per_sec = env.metadata.get('video.frames_per_second', 30)
+        if capture_every < 1:
+            raise error.Error('capture_every must be at least 1, not {}'.format(capture_every))
+        self.capture_every = capture_every
+        self.target_size = target_size
+        self.encoder_options = encoder_options
+        self.tracer = tracer
+        self.frames_per_sec = env.metadata.get('video.frames_per_second', 30) / float(capture_every)
+        # Frames seen by capture_frame, including skipped ones
+        self.frames_seen = 0
+        self.frame_queue_size = frame_queue_size
+        self.drop_frames = drop_frames
         self.encoder = None # lazily start the process
         self.broken = False
 
@@ -99,6 +116,9 @@ class VideoRecorder(object):
     def capture_frame(self):
         """Render the given `env` and add the resulting frame to the video."""
         if not self.functional: return
+        self.frames_seen += 1
+        if (self.frames_seen - 1) % self.capture_every != 0:
+            return
         logger.debug('Capturing video frame: path=%s', self.path)
 
         render_mode = 'ansi' if self.ansi_mode else 'rgb_array'
@@ -123,7 +143,15 @@ class VideoRecorder(object):
 
         if self.encoder:
             logger.debug('Closing video encoder: path=%s', self.path)
+            if self.tracer is not None:
+                self.tracer.begin('encoder_close')
             self.encoder.close()
+            if self.tracer is not None:
+                self.tracer.end('encoder_close')
+            frames_dropped = getattr(self.encoder, 'frames_dropped', 0)
+            if frames_dropped:
+                logger.warn('Dropped %d frames because the video encoder fell behind: path=%s', frames_dropped, self.path)
+                self.metadata['frames_dropped'] = frames_dropped
             self.encoder = None
         else:
             # No frames captured. Set metadata, and remove the empty output file.
@@ -153,15 +181,29 @@ class VideoRecorder(object):
 
     def _encode_ansi_frame(self, frame):
         if not self.encoder:
+            if self.tracer is not None:
+                self.tracer.begin('encoder_open')
             self.encoder = TextEncoder(self.path, self.frames_per_sec)
             self.metadata['encoder_version'] = self.encoder.version_info
+            if self.tracer is not None:
+                self.tracer.end('encoder_open')
         self.encoder.capture_frame(frame)
         self.empty = False
 
     def _encode_image_frame(self, frame):
+        if self.target_size is not None and isinstance(frame, np.ndarray) and frame.ndim == 3:
+            frame = downscale_frame(frame, self.target_size)
+
         if not self.encoder:
-            self.encoder = ImageEncoder(self.path, frame.shape, self.frames_per_sec)
-            self.metadata['encoder_version'] = self.encoder.version_info
+            if self.tracer is not None:
+                self.tracer.begin('encoder_open')
+            try:
+                self.encoder = ImageEncoder(self.path, frame.shape, self.frames_per_sec, frame_queue_size=self.frame_queue_size, drop_frames=self.drop_frames, encoder_options=self.encoder_options)
+                self.metadata['encoder_version'] = self.encoder.version_info
+            finally:
+                # e.g. if ffmpeg isn't installed
+                if self.tracer is not None:
+                    self.tracer.end('encoder_open')
 
         try:
             self.encoder.capture_frame(frame)
@@ -172,14 +214,56 @@ class VideoRecorder(object):
             self.empty = False
 
 
+def downscale_frame(frame, size):
+    """Area-downscale an (h, w, channels) uint8 frame to fit within
+    size=(width, height), keeping its aspect ratio. Each output pixel is
+    the mean of the input pixels it covers. Frames which already fit
+    are returned as-is.
+
+    Output dimensions are rounded down to even numbers, which libx264
+    needs for yuv420p, so the result may be a pixel short of `size`.
+    """
+    h, w = frame.shape[:2]
+    if w <= size[0] and h <= size[1]:
+        return frame
+    # One scale factor for both axes, min(size[0] / w, size[1] / h), in
+    # integer arithmetic so it's exact
+    if size[0] * h <= size[1] * w:
+        target_w, target_h = size[0], h * size[0] // w
+    else:
+        target_w, target_h = w * size[1] // h, size[1]
+    target_w = max(2, target_w - target_w % 2)
+    target_h = max(2, target_h - target_h % 2)
+
+    # Start of the band of input rows/columns for each output pixel
+    rows = (np.arange(target_h) * h) // target_h
+    cols = (np.arange(target_w) * w) // target_w
+    sums = np.add.reduceat(np.add.reduceat(frame.astype(np.uint32), rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, h)), np.diff(np.append(cols, w)))
+    return ((sums + counts[..., None] // 2) // counts[..., None]).astype(np.uint8)
+
 class TextEncoder(object):
     """Store a moving picture made out of ANSI frames. Format adapted from
-    https://github.com/asciinema/asciinema/blob/master/doc/asciicast-v1.md"""
+    https://github.com/asciinema/asciinema/blob/master/doc/asciicast-v1.md
+
+    Events are streamed to the output file as frames arrive, so memory
+    use doesn't grow with the length of the episode. Since the terminal
+    size and duration are only known at the end, those fields are
+    written after the events, when the encoder is closed. (Key order
+    doesn't matter to JSON readers.)"""
 
     def __init__(self, output_path, frames_per_sec):
         self.output_path = output_path
         self.frames_per_sec = frames_per_sec
-        self.frames = []
+        #self.frame_duration = float(1) / self.frames_per_sec
+        self.frame_duration = .5
+        self.frame_count = 0
+        # Largest frame dimensions seen so far
+        self.max_lines = 0
+        self.max_line_length = 0
+
+        self.output = open(output_path, 'w')
+        self.output.write('{"version": 1, "stdout": [')
 
     def capture_frame(self, frame):
         string = None
@@ -198,45 +282,135 @@ class TextEncoder(object):
         if six.b('\r') in frame_bytes:
             raise error.InvalidFrame('Frame contains carriage returns (only newlines are allowed: """{}"""'.format(string))
 
-        self.frames.append(frame_bytes)
-
-    def close(self):
-        #frame_duration = float(1) / self.frames_per_sec
-        frame_duration = .5
+        self.max_lines = max(self.max_lines, frame_bytes.count(six.b('\n')))
+        self.max_line_length = max(self.max_line_length, max(len(line) for line in frame_bytes.split(six.b('\n'))))
 
         # Turn frames into events: clear screen beforehand
         # https://rosettacode.org/wiki/Terminal_control/Clear_the_screen#Python
         # https://rosettacode.org/wiki/Terminal_control/Cursor_positioning#Python
         clear_code = six.b("%c[2J\033[1;1H" % (27))
         # Decode the bytes as UTF-8 since JSON may only contain UTF-8
-        events = [ (frame_duration, (clear_code+frame.replace(six.b('\n'),six.b('\r\n'))).decode('utf-8'))  for frame in self.frames ]
+        event = (self.frame_duration, (clear_code+frame_bytes.replace(six.b('\n'),six.b('\r\n'))).decode('utf-8'))
+        if self.frame_count > 0:
+            self.output.write(', ')
+        self.output.write(json.dumps(event))
+        self.frame_count += 1
 
+    def close(self):
         # Calculate frame size from the largest frames.
         # Add some padding since we'll get cut off otherwise.
-        height = max([frame.count(six.b('\n')) for frame in self.frames]) + 1
-        width = max([max([len(line) for line in frame.split(six.b('\n'))]) for frame in self.frames]) + 2
-
-        data = {
-            "version": 1,
-            "width": width,
-            "height": height,
-            "duration": len(self.frames)*frame_duration,
+        header = {
+            "width": self.max_line_length + 2,
+            "height": self.max_lines + 1,
+            "duration": self.frame_count*self.frame_duration,
             "command": "-",
             "title": "gym VideoRecorder episode",
             "env": {}, # could add some env metadata here
-            "stdout": events,
         }
-
-        with open(self.output_path, 'w') as f:
-            json.dump(data, f)
+        # Splice the remaining fields into the top-level object
+        self.output.write('], ' + json.dumps(header)[1:])
+        self.output.close()
 
     @property
     def version_info(self):
         return {'backend':'TextEncoder','version':1}
 
+class FrameWriter(object):
+    """Writes encoded frames to a stream (the encoder's stdin) from a
+    background thread, so that a slow encoder doesn't stall the caller.
+
+    At most `queue_size` frames wait to be written. When the queue is
+    full, write either blocks or, if drop_frames is set, drops the frame
+    and counts it in frames_dropped. Errors writing to the stream are
+    raised from the next call to write or close.
+    """
+
+    def __init__(self, stream, queue_size=64, drop_frames=False):
+        self.stream = stream
+        self.drop_frames = drop_frames
+        self.frames_dropped = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name='gym-video-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, data):
+        if self.error is not None:
+            raise self.error
+        if not self.drop_frames:
+            self._queue.put(data)
+            return
+        try:
+            self._queue.put_nowait(data)
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close(self):
+        """Wait for all queued frames to be written."""
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            # After an error, keep draining so writers never block
+            if self.error is None:
+                try:
+                    self.stream.write(data)
+                except (IOError, OSError) as e:
+                    self.error = e
+
+# Looking up the encoder and its version takes a few subprocesses and
+# PATH scans, so we do it once per process.
+_encoder_backend = None
+_encoder_versions = {}
+
+def encoder_backend():
+    """The video encoder executable to use: 'ffmpeg' or 'avconv'."""
+    global _encoder_backend
+    if _encoder_backend is None:
+        # Imported here rather than at module level, since distutils
+        # is slow to import and most processes never record a video.
+        import distutils.spawn
+        if distutils.spawn.find_executable('ffmpeg') is not None:
+            _encoder_backend = 'ffmpeg'
+        elif distutils.spawn.find_executable('avconv') is not None:
+            _encoder_backend = 'avconv'
+        else:
+            raise error.DependencyNotInstalled("""Found neither the ffmpeg nor avconv executables. On OS X, you can install ffmpeg via `brew install ffmpeg`. On most Ubuntu variants, `sudo apt-get install ffmpeg` should do it. On Ubuntu 14.04, however, you'll need to install avconv with `sudo apt-get install libav-tools`.""")
+    return _encoder_backend
+
+def encoder_version(backend):
+    if backend not in _encoder_versions:
+        _encoder_versions[backend] = str(subprocess.check_output([backend, '-version']))
+    return _encoder_versions[backend]
+
 class ImageEncoder(object):
-    def __init__(self, output_path, frame_shape, frames_per_sec):
+    """Encodes rgb_array frames to a video by piping them to ffmpeg or
+    avconv.
+
+    encoder_options may contain:
+        codec (str): The output codec (default: 'libx264')
+        preset (str): The encoder preset, e.g. 'ultrafast', which trades compression for speed
+        crf (int): Constant rate factor, i.e. the quality (lower is better)
+        threads (int): Number of encoder threads
+    """
+
+    DEFAULT_ENCODER_OPTIONS = {
+        'codec': 'libx264',
+        'preset': None,
+        'crf': None,
+        'threads': None,
+    }
+
+    def __init__(self, output_path, frame_shape, frames_per_sec, frame_queue_size=64, drop_frames=False, encoder_options=None):
         self.proc = None
+        self.writer = None
         self.output_path = output_path
         # Frame shape should be lines-first, so w and h are swapped
         h, w, pixfmt = frame_shape
@@ -246,26 +420,37 @@ class ImageEncoder(object):
         self.includes_alpha = (pixfmt == 4)
         self.frame_shape = frame_shape
         self.frames_per_sec = frames_per_sec
+        self.frame_queue_size = frame_queue_size
+        self.drop_frames = drop_frames
 
-        if distutils.spawn.find_executable('ffmpeg') is not None:
-            self.backend = 'ffmpeg'
-        elif distutils.spawn.find_executable('avconv') is not None:
-            self.backend = 'avconv'
-        else:
-            raise error.DependencyNotInstalled("""Found neither the ffmpeg nor avconv executables. On OS X, you can install ffmpeg via `brew install ffmpeg`. On most Ubuntu variants, `sudo apt-get install ffmpeg` should do it. On Ubuntu 14.04, however, you'll need to install avconv with `sudo apt-get install libav-tools`.""")
+        encoder_options = encoder_options or {}
+        unknown = set(encoder_options) - set(self.DEFAULT_ENCODER_OPTIONS)
+        if unknown:
+            raise error.Error('Unknown encoder options {}; valid options are {}'.format(', '.join(sorted(unknown)), ', '.join(sorted(self.DEFAULT_ENCODER_OPTIONS))))
+        self.encoder_options = dict(self.DEFAULT_ENCODER_OPTIONS, **encoder_options)
 
+        self.backend = encoder_backend()
         self.start()
 
     @property
     def version_info(self):
-        return {'backend':self.backend,'version':str(subprocess.check_output([self.backend, '-version'])),'cmdline':self.cmdline}
+        return {'backend':self.backend,'version':encoder_version(self.backend),'cmdline':self.cmdline}
 
     def start(self):
+        options = self.encoder_options
+        output_options = ('-vcodec', options['codec'])
+        if options['preset'] is not None:
+            output_options += ('-preset', options['preset'])
+        if options['crf'] is not None:
+            output_options += ('-crf', str(options['crf']))
+        if options['threads'] is not None:
+            output_options += ('-threads', str(options['threads']))
+
         self.cmdline = (self.backend,
                      '-nostats',
                      '-loglevel', 'error', # suppress warnings
                      '-y',
-                     '-r', '%d' % self.frames_per_sec,
+                     '-r', '{:g}'.format(self.frames_per_sec),
 
                      # input
                      '-f', 'rawvideo',
@@ -274,13 +459,19 @@ class ImageEncoder(object):
                      '-i', '-', # this used to be /dev/stdin, which is not Windows-friendly
 
                      # output
-                     '-vcodec', 'libx264',
+                     ) + output_options + (
                      '-pix_fmt', 'yuv420p',
                      self.output_path
                      )
 
         logger.debug('Starting ffmpeg with "%s"', ' '.join(self.cmdline))
         self.proc = subprocess.Popen(self.cmdline, stdin=subprocess.PIPE)
+        if self.frame_queue_size:
+            self.writer = FrameWriter(self.proc.stdin, queue_size=self.frame_queue_size, drop_frames=self.drop_frames)
+
+    @property
+    def frames_dropped(self):
+        return self.writer.frames_dropped if self.writer is not None else 0
 
     def capture_frame(self, frame):
         if not isinstance(frame, (np.ndarray, np.generic)):
@@ -290,12 +481,25 @@ class ImageEncoder(object):
         if frame.dtype != np.uint8:
             raise error.InvalidFrame("Your frame has data type {}, but we require uint8 (i.e. RGB values from 0-255).".format(frame.dtype))
 
-        if distutils.version.LooseVersion(np.__version__) >= distutils.version.LooseVersion('1.9.0'):
-            self.proc.stdin.write(frame.tobytes())
+        # Either way this copies the frame, so it's safe for the env to
+        # reuse its buffer while the frame is queued
+        if hasattr(frame, 'tobytes'): # numpy >= 1.9
+            data = frame.tobytes()
+        else:
+            data = frame.tostring()
+
+        if self.writer is not None:
+            self.writer.write(data)
         else:
-            self.proc.stdin.write(frame.tostring())
+            self.proc.stdin.write(data)
 
     def close(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except (IOError, OSError) as e:
+                # Most likely the encoder died, which we report below
+                logger.error('Failed to write video frames to the encoder: %s', e)
         self.proc.stdin.close()
         ret = self.proc.wait()
         if ret != 0:
@@ -1,14 +1,23 @@
+import io
 import logging
 import json
 import os
 import re
 import tarfile
 import tempfile
+import threading
+import time
+from six.moves import queue
 from gym import error, monitoring
 from gym.scoreboard.client import resource, util
+from gym.utils import parallel_gzip
 import numpy as np
 
 MAX_VIDEOS = 100
+# Compressed video archives are spooled to disk beyond this size
+SPOOL_MAX_MEMORY = 64 << 20
+TAR_FORMAT = tarfile.PAX_FORMAT
+TAR_ENCODING = 'utf-8'
 
 logger = logging.getLogger(__name__)
 
@@ -126,19 +135,140 @@ def upload_training_episode_batch(episode_lengths, episode_rewards, timestamps,
     })
     return file_upload
 
-def upload_training_video(videos, api_key=None, env_id=None):
-    """videos: should be list of (video_path, metadata_path) tuples"""
-    with tempfile.TemporaryFile() as archive_file:
-        write_archive(videos, archive_file, env_id=env_id)
-        archive_file.seek(0)
+def upload_training_video(videos, api_key=None, env_id=None, compresslevel=None):
+    """videos: should be list of (video_path, metadata_path) tuples
 
-        logger.info('[%s] Uploading videos of %d training episodes (%d bytes)', env_id, len(videos), util.file_size(archive_file))
-        file_upload = resource.FileUpload.create(purpose='video', content_type='application/vnd.openai.video+x-compressed', api_key=api_key)
-        file_upload.put(archive_file, encode=None)
+    The archive is streamed into the upload as it's produced. S3 needs
+    to know its length up front, so by default its gzip members are only
+    stored, whatever the videos' format. With compresslevel > 0, the
+    length is only known once everything is compressed, so the archive
+    is spooled first (to disk beyond SPOOL_MAX_MEMORY), and the upload
+    only starts after that.
+    """
+    if compresslevel is None:
+        compresslevel = 0
+    archive = ArchiveStream(videos, env_id=env_id, compresslevel=compresslevel)
+    logger.info('[%s] Uploading videos of %d training episodes', env_id, len(videos))
+    file_upload = resource.FileUpload.create(purpose='video', content_type='application/vnd.openai.video+x-compressed', api_key=api_key)
+    if archive.length is not None:
+        file_upload.put(archive, encode=None, length=archive.length)
+    else:
+        logger.info('[%s] Compressing videos before uploading them, since compresslevel=%d', env_id, compresslevel)
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as f:
+            for chunk in archive:
+                f.write(chunk)
+            length = f.tell()
+            f.seek(0)
+            file_upload.put(iter(lambda: f.read(ArchiveStream.CHUNK_SIZE), b''), encode=None, length=length)
+    logger.info('[%s] Uploaded %d bytes of video', env_id, archive.size)
 
     return file_upload
 
-def write_archive(videos, archive_file, env_id=None):
+def write_archive(videos, archive_file, env_id=None, compresslevel=None):
+    manifest = _check_videos(videos, env_id)
+    _write_tar(_archive_members(videos, manifest), archive_file, _compresslevel(videos, compresslevel))
+
+class ArchiveStream(object):
+    """The gzipped tar of a list of videos, as an iterable of bytes.
+
+    The archive is compressed on a background thread as it's consumed,
+    so an upload can start before compression is done, and only a few
+    chunks are ever held in memory. Nothing is written to disk. The
+    videos are checked up front, so problems are reported before
+    anything is sent.
+
+    Compression is spread over all cores (see ParallelGzipWriter). By
+    default MP4s, which are already compressed, are only stored; pass
+    compresslevel to override that. Stored archives have a length
+    known before they're produced; otherwise length is None.
+    """
+
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, videos, env_id=None, queue_size=16, compresslevel=None):
+        self.videos = videos
+        self.compresslevel = _compresslevel(videos, compresslevel)
+        self.env_id = env_id
+        self.queue_size = queue_size
+        self.manifest = _check_videos(videos, env_id)
+        self._members = _archive_members(videos, self.manifest)
+        if self.compresslevel == 0:
+            self.length = parallel_gzip.stored_size(_tar_size(self._members))
+        else:
+            self.length = None
+        # Bytes produced so far
+        self.size = 0
+
+    def __iter__(self):
+        writer = _QueueWriter(queue.Queue(maxsize=self.queue_size), self.CHUNK_SIZE)
+        thread = threading.Thread(target=self._produce, args=(writer,), name='ArchiveStream')
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                chunk, e = writer.queue.get()
+                if chunk is None:
+                    if e is not None:
+                        raise e
+                    return
+                self.size += len(chunk)
+                yield chunk
+        finally:
+            # Stop the producer if the upload gave up early
+            writer.aborted.set()
+            thread.join()
+
+    def _produce(self, writer):
+        try:
+            _write_tar(self._members, writer, self.compresslevel)
+            writer.flush()
+            writer.put((None, None))
+        except _Aborted:
+            pass
+        except Exception as e:
+            try:
+                writer.put((None, e))
+            except _Aborted:
+                pass
+
+class _QueueWriter(object):
+    """A write-only file which passes its contents to a queue in chunks."""
+
+    def __init__(self, queue, chunk_size):
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.aborted = threading.Event()
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffered > 0:
+            chunk = b''.join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self.put((chunk, None))
+
+    def put(self, item):
+        while True:
+            if self.aborted.is_set():
+                raise _Aborted()
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+class _Aborted(Exception):
+    pass
+
+def _check_videos(videos, env_id=None):
+    """Sanity check the videos for an archive, and return its manifest."""
     if len(videos) > MAX_VIDEOS:
         raise error.Error('[{}] Trying to upload {} videos, but there is a limit of {} currently. If you actually want to upload this many videos, please email gym@openai.com with your use-case.'.format(env_id, MAX_VIDEOS, len(videos)))
 
@@ -151,40 +281,81 @@ def write_archive(videos, archive_file, env_id=None):
         'videos': []
     }
 
-    with tarfile.open(fileobj=archive_file, mode='w:gz') as tar:
-        for video_path, metadata_path in videos:
-            video_name = os.path.basename(video_path)
-            metadata_name = os.path.basename(metadata_path)
-
-            if not os.path.exists(video_path):
-                raise error.Error('[{}] No such video file {}. (HINT: Your video recorder may have broken midway through the run. You can check this with `video_recorder.functional`.)'.format(env_id, video_path))
-            elif not os.path.exists(metadata_path):
-                raise error.Error('[{}] No such metadata file {}. (HINT: this should be automatically created when using a VideoRecorder instance.)'.format(env_id, video_path))
-
-            # Do some sanity checking
-            if video_name in basenames:
-                raise error.Error('[{}] Duplicated video name {} in video list: {}'.format(env_id, video_name, videos))
-            elif metadata_name in basenames:
-                raise error.Error('[{}] Duplicated metadata file name {} in video list: {}'.format(env_id, metadata_name, videos))
-            elif not video_name_re.search(video_name):
-                raise error.Error('[{}] Invalid video name {} (must match {})'.format(env_id, video_name, video_name_re.pattern))
-            elif not metadata_name_re.search(metadata_name):
-                raise error.Error('[{}] Invalid metadata file name {} (must match {})'.format(env_id, metadata_name, metadata_name_re.pattern))
-
-            # Record that we've seen these names; add to manifest
-            basenames.add(video_name)
-            basenames.add(metadata_name)
-            manifest['videos'].append((video_name, metadata_name))
-
-            # Import the files into the archive
-            tar.add(video_path, arcname=video_name, recursive=False)
-            tar.add(metadata_path, arcname=metadata_name, recursive=False)
-
-        f = tempfile.NamedTemporaryFile(mode='w+', delete=False)
-        try:
-            json.dump(manifest, f)
-            f.close()
-            tar.add(f.name, arcname='manifest.json')
-        finally:
-            f.close()
-            os.remove(f.name)
+    for video_path, metadata_path in videos:
+        video_name = os.path.basename(video_path)
+        metadata_name = os.path.basename(metadata_path)
+
+        if not os.path.exists(video_path):
+            raise error.Error('[{}] No such video file {}. (HINT: Your video recorder may have broken midway through the run. You can check this with `video_recorder.functional`.)'.format(env_id, video_path))
+        elif not os.path.exists(metadata_path):
+            raise error.Error('[{}] No such metadata file {}. (HINT: this should be automatically created when using a VideoRecorder instance.)'.format(env_id, video_path))
+
+        # Do some sanity checking
+        if video_name in basenames:
+            raise error.Error('[{}] Duplicated video name {} in video list: {}'.format(env_id, video_name, videos))
+        elif metadata_name in basenames:
+            raise error.Error('[{}] Duplicated metadata file name {} in video list: {}'.format(env_id, metadata_name, videos))
+        elif not video_name_re.search(video_name):
+            raise error.Error('[{}] Invalid video name {} (must match {})'.format(env_id, video_name, video_name_re.pattern))
+        elif not metadata_name_re.search(metadata_name):
+            raise error.Error('[{}] Invalid metadata file name {} (must match {})'.format(env_id, metadata_name, metadata_name_re.pattern))
+
+        # Record that we've seen these names; add to manifest
+        basenames.add(video_name)
+        basenames.add(metadata_name)
+        manifest['videos'].append((video_name, metadata_name))
+    return manifest
+
+def _compresslevel(videos, compresslevel):
+    if compresslevel is None:
+        # Gzip gains next to nothing on MP4s
+        compresslevel = 0 if all(video_path.endswith('.mp4') for video_path, _ in videos) else 6
+    return compresslevel
+
+def _archive_members(videos, manifest):
+    """The (TarInfo, path, data) of each file in an archive, in order.
+
+    Headers are fixed here, rather than taken from the files as they're
+    added, so that the size of the tar can be worked out in advance.
+    """
+    members = []
+    for (video_path, metadata_path), (video_name, metadata_name) in zip(videos, manifest['videos']):
+        for path, name in [(video_path, video_name), (metadata_path, metadata_name)]:
+            stat = os.stat(path)
+            info = tarfile.TarInfo(name)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            members.append((info, path, None))
+
+    data = json.dumps(manifest).encode('utf-8')
+    info = tarfile.TarInfo('manifest.json')
+    info.size = len(data)
+    info.mtime = int(time.time())
+    members.append((info, None, data))
+    return members
+
+def _tar_size(members):
+    size = 0
+    for info, _, _ in members:
+        header = info.tobuf(TAR_FORMAT, TAR_ENCODING, 'strict')
+        size += len(header) + -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+    # Two empty blocks end the archive, which is padded to a whole record
+    size += 2 * tarfile.BLOCKSIZE
+    return -(-size // tarfile.RECORDSIZE) * tarfile.RECORDSIZE
+
+def _write_tar(members, fileobj, compresslevel):
+    gz = parallel_gzip.ParallelGzipWriter(fileobj, compresslevel=compresslevel)
+    try:
+        # Stream mode, since fileobj may not be seekable
+        with tarfile.open(fileobj=gz, mode='w|', format=TAR_FORMAT, encoding=TAR_ENCODING, errors='strict') as tar:
+            for info, path, data in members:
+                if path is None:
+                    tar.addfile(info, io.BytesIO(data))
+                else:
+                    # Copies exactly info.size bytes, so the archive is
+                    # the size we said, even if the file has changed
+                    with open(path, 'rb') as f:
+                        tar.addfile(info, f)
+        gz.close()
+    finally:
+        gz.terminate()
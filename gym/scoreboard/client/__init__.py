@@ -1,6 +1,15 @@
 import logging
 import os
 
+import gym
 from gym import error
 
 logger = logging.getLogger(__name__)
+
+def sanity_check_dependencies():
+    import requests
+
+    if gym._version_tuple(requests.__version__) < (2, 0):
+        logger.warn("You have 'requests' version %s installed, but 'gym' requires at least 2.0. HINT: upgrade via 'pip install -U requests'.", requests.__version__)
+
+sanity_check_dependencies()
@@ -357,7 +357,7 @@ class FileUpload(ListableAPIResource):
             'post', url, params=params)
         return convert_to_gym_object(response, api_key)
 
-    def put(self, contents, encode='json'):
+    def put(self, contents, encode='json', length=None):
         supplied_headers = {
             "Content-Type": self.content_type
         }
@@ -368,10 +368,18 @@ class FileUpload(ListableAPIResource):
         else:
             raise error.Error('Encode request for put must be "json" or None, not {}'.format(encode))
 
-        files = {'file': contents}
+        if isinstance(contents, (string_types, bytes)) or hasattr(contents, 'read'):
+            post_data, files, headers = self.post_fields, {'file': contents}, {}
+        else:
+            # An iterable of chunks, e.g. an archive which is still
+            # being compressed, sent as it's produced.
+            if length is None:
+                raise error.Error('Uploading an iterable needs its length, since S3 does not accept chunked uploads')
+            post_data = util.MultipartBody(self.post_fields, 'file', contents, length)
+            files, headers = None, {'Content-Type': post_data.content_type}
 
         body, code, headers = api_requestor.http_client.request(
-            'post', self.post_url, post_data=self.post_fields, files=files, headers={})
+            'post', self.post_url, post_data=post_data, files=files, headers=headers)
         if code != 204:
             raise error.Error("Upload to S3 failed. If error persists, please contact us at gym@openai.com this message. S3 returned '{} -- {}'. Tried 'POST {}' with fields {}.".format(code, body, self.post_url, self.post_fields))
 
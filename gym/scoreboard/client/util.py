@@ -1,6 +1,9 @@
 import logging
 import os
 import sys
+import uuid
+
+from gym import error
 
 logger = logging.getLogger(__name__)
 
@@ -12,3 +15,65 @@ def utf8(value):
 
 def file_size(f):
     return os.fstat(f.fileno()).st_size
+
+class MultipartBody(object):
+    """Form fields followed by a file, as a multipart/form-data request
+    body which is read as it's sent, without holding the file in
+    memory.
+
+    The file's length must be given up front. The body has a len(), so
+    requests sends a Content-Length rather than using chunked transfer
+    encoding, which S3 doesn't accept for POST uploads.
+
+    Args:
+        fields (dict): Form fields, sent before the file.
+        name (str): The file's field name.
+        chunks (iterable): The file's contents, as bytes.
+        length (int): The total length of chunks.
+    """
+
+    def __init__(self, fields, name, chunks, length):
+        boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={}'.format(boundary)
+        head = ''.join(
+            ['--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(boundary, key, value) for key, value in fields.items()] +
+            ['--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n\r\n'.format(boundary, name, name)]
+        ).encode('utf-8')
+        tail = '\r\n--{}--\r\n'.format(boundary).encode('utf-8')
+        self.length = len(head) + length + len(tail)
+
+        self._parts = self._iter_parts(head, chunks, length, tail)
+        self._chunk = b''
+        self._offset = 0
+
+    def _iter_parts(self, head, chunks, length, tail):
+        yield head
+        sent = 0
+        for chunk in chunks:
+            sent += len(chunk)
+            if sent > length:
+                break
+            yield chunk
+        if sent != length:
+            # Otherwise the server would wait for more, or cut us off
+            raise error.Error('Expected {} bytes to upload, but got {}{}'.format(length, sent, ' or more' if sent > length else ''))
+        yield tail
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        out = []
+        while size != 0:
+            if self._offset == len(self._chunk):
+                self._chunk = next(self._parts, None)
+                self._offset = 0
+                if self._chunk is None:
+                    self._chunk = b''
+                    break
+            end = len(self._chunk) if size < 0 else min(len(self._chunk), self._offset + size)
+            out.append(self._chunk[self._offset:end])
+            if size > 0:
+                size -= end - self._offset
+            self._offset = end
+        return b''.join(out)
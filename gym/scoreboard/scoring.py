@@ -87,6 +87,134 @@ def score_from_merged(episode_lengths, episode_rewards, timestamps, initial_rese
         'seconds_in_total': seconds_in_total,
     }
 
+def score_from_local_batch(directories):
+    """Calculate scores for many local results directories, e.g. from a
+    hyperparameter sweep. Each directory is loaded once, and runs of
+    the same env are scored together with score_batch.
+
+    Returns:
+        A list with the score of each directory, as from score_from_local.
+    """
+    by_env = {}
+    for i, directory in enumerate(directories):
+        results = gym.monitoring.monitor.load_results(directory, as_numpy=True)
+        if results is None:
+            continue
+        by_env.setdefault(results['env_info']['env_id'], []).append((i, results))
+
+    scores = [None] * len(directories)
+    for env_id, runs in by_env.items():
+        spec = gym.spec(env_id)
+        offsets = np.cumsum([0] + [len(results['episode_rewards']) for _, results in runs])
+        batch = score_batch(
+            np.concatenate([results['episode_lengths'] for _, results in runs]),
+            np.concatenate([results['episode_rewards'] for _, results in runs]),
+            np.concatenate([results['timestamps'] for _, results in runs]),
+            offsets,
+            [results['initial_reset_timestamp'] for _, results in runs],
+            spec.trials, spec.reward_threshold)
+        for run, (i, _) in enumerate(runs):
+            scores[i] = batch_score(batch, run)
+    return scores
+
+def score_batch(episode_lengths, episode_rewards, timestamps, offsets, initial_reset_timestamps, trials, reward_threshold):
+    """Score many runs of the same env at once.
+
+    The runs are concatenated: run i's episodes are at
+    offsets[i]:offsets[i+1] of episode_lengths, episode_rewards and
+    timestamps. Running means, threshold crossings and best windows
+    are computed for all runs together, in a few vectorized passes, and
+    agree with score_from_merged up to floating point rounding.
+
+    Returns:
+        A dict with an array for each of score_from_merged's keys,
+        indexed by run. Missing values are NaN, or -1 for
+        episode_t_value and timestep_t_value. (See batch_score for
+        getting a single run's score in score_from_merged's format.)
+    """
+    episode_lengths = np.asarray(episode_lengths, dtype='int64')
+    episode_rewards = np.asarray(episode_rewards, dtype='float64')
+    timestamps = np.asarray(timestamps, dtype='float64')
+    offsets = np.asarray(offsets, dtype='int64')
+    initial_reset_timestamps = np.array([np.nan if t is None else t for t in initial_reset_timestamps], dtype='float64')
+
+    starts, ends = offsets[:-1], offsets[1:]
+    counts = ends - starts
+    num_runs = len(counts)
+    total = offsets[-1]
+
+    cumulative_timesteps = np.cumsum(np.insert(episode_lengths, 0, 0))
+    cumulative_rewards = np.cumsum(np.insert(episode_rewards, 0, 0))
+
+    seconds_in_total = np.full(num_runs, np.nan)
+    nonempty = counts > 0
+    seconds_in_total[nonempty] = timestamps[ends[nonempty] - 1] - initial_reset_timestamps[nonempty]
+
+    episode_t_value = np.full(num_runs, -1, dtype='int64')
+    timestep_t_value = np.full(num_runs, -1, dtype='int64')
+    seconds_to_solve = np.full(num_runs, np.nan)
+    mean = np.full(num_runs, np.nan)
+    error = np.full(num_runs, np.nan)
+
+    # Every window of `trials` episodes which lies within a single run,
+    # by the index of its first episode
+    run_of = np.repeat(np.arange(num_runs), counts)
+    window_starts = np.arange(total)
+    valid = window_starts + trials <= ends[run_of]
+    window_starts, window_runs = window_starts[valid], run_of[valid]
+    means = (cumulative_rewards[window_starts + trials] - cumulative_rewards[window_starts]) / trials
+
+    if reward_threshold is not None:
+        # The first window of each run at or above the threshold.
+        # (np.unique returns the first occurrence of each run.)
+        above = means >= reward_threshold
+        solved_runs, first = np.unique(window_runs[above], return_index=True)
+        solved = window_starts[above][first]
+        episode_t_value[solved_runs] = solved - starts[solved_runs]
+        timestep_t_value[solved_runs] = cumulative_timesteps[solved] - cumulative_timesteps[starts[solved_runs]]
+        seconds_to_solve[solved_runs] = timestamps[solved] - initial_reset_timestamps[solved_runs]
+
+    if len(window_starts) > 0:
+        # The window with the best mean in each run, taking the first
+        # on ties as np.argmax does
+        order = np.lexsort((window_starts, -means, window_runs))
+        scored_runs, first = np.unique(window_runs[order], return_index=True)
+        best = window_starts[order][first]
+        best_rewards = episode_rewards[best[:, np.newaxis] + np.arange(trials)]
+        mean[scored_runs] = np.mean(best_rewards, axis=1)
+        if trials == 1: # avoid NaN
+            error[scored_runs] = 0.
+        else:
+            error[scored_runs] = np.std(best_rewards, axis=1) / (np.sqrt(trials) - 1)
+
+    return {
+        'episode_t_value': episode_t_value,
+        'timestep_t_value': timestep_t_value,
+        'mean': mean,
+        'error': error,
+        'number_episodes': counts,
+        'number_timesteps': cumulative_timesteps[ends] - cumulative_timesteps[starts],
+        'seconds_to_solve': seconds_to_solve,
+        'seconds_in_total': seconds_in_total,
+    }
+
+def batch_score(batch, run):
+    """Extract one run's score from the result of score_batch, in the
+    format of score_from_merged."""
+    def value(key, missing):
+        v = batch[key][run]
+        return None if missing(v) else v.item()
+    return {
+        'episode_t_value': value('episode_t_value', lambda v: v < 0),
+        'timestep_t_value': value('timestep_t_value', lambda v: v < 0),
+        'mean': value('mean', np.isnan),
+        'error': value('error', np.isnan),
+        'number_episodes': batch['number_episodes'][run].item(),
+        'number_timesteps': batch['number_timesteps'][run].item(),
+        'seconds_to_solve': value('seconds_to_solve', np.isnan),
+        'seconds_in_total': value('seconds_in_total', np.isnan),
+    }
+
 def running_mean(x, N):
     x = np.array(x, dtype='float64')
     cumsum = np.cumsum(np.insert(x, 0, 0))
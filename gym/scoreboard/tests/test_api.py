@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import tarfile
+import threading
+
+import mock
+from six.moves import BaseHTTPServer
+
+from gym.monitoring.tests import helpers
+from gym.scoreboard import api
+from gym.scoreboard.client import resource, util
+
+def write_videos(directory, count, size, extension='mp4'):
+    videos = []
+    for i in range(count):
+        video_path = os.path.join(directory, 'video{}.{}'.format(i, extension))
+        metadata_path = os.path.join(directory, 'video{}.meta.json'.format(i))
+        with open(video_path, 'wb') as f:
+            f.write(os.urandom(size))
+        with open(metadata_path, 'w') as f:
+            json.dump({'episode_id': i}, f)
+        videos.append((video_path, metadata_path))
+    return videos
+
+def test_archive_stream():
+    with helpers.tempdir() as temp:
+        videos = write_videos(temp, 3, 700000)
+        archive = api.ArchiveStream(videos, queue_size=1)
+        chunks = list(archive)
+        assert len(chunks) > 1
+        data = b''.join(chunks)
+        assert archive.size == len(data)
+
+        with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as tar:
+            assert sorted(tar.getnames()) == sorted(['manifest.json'] + [os.path.basename(path) for video in videos for path in video])
+            manifest = json.loads(tar.extractfile('manifest.json').read().decode('utf-8'))
+            with open(videos[0][0], 'rb') as f:
+                assert tar.extractfile('video0.mp4').read() == f.read()
+        assert manifest['videos'] == [['video{}.mp4'.format(i), 'video{}.meta.json'.format(i)] for i in range(3)]
+
+def test_archive_stream_stops_when_abandoned():
+    with helpers.tempdir() as temp:
+        videos = write_videos(temp, 3, 700000)
+        chunks = iter(api.ArchiveStream(videos, queue_size=1))
+        next(chunks)
+        # Joins the producer, which must notice it's no longer needed
+        chunks.close()
+
+def test_archive_stream_length():
+    with helpers.tempdir() as temp:
+        videos = write_videos(temp, 3, 700000)
+        archive = api.ArchiveStream(videos)
+        assert archive.length == len(b''.join(archive))
+
+        archive = api.ArchiveStream(videos, compresslevel=6)
+        assert archive.length is None
+
+def test_multipart_body():
+    body = util.MultipartBody({'key': 'value'}, 'file', iter([b'abc', b'def']), 6)
+    boundary = body.content_type.split('boundary=')[1]
+    data = body.read(1) + body.read(10) + body.read()
+    assert len(body) == len(data)
+    data = data.decode('utf-8')
+    assert data.startswith('--{}\r\nContent-Disposition: form-data; name="key"\r\n\r\nvalue\r\n'.format(boundary))
+    assert data.endswith('filename="file"\r\n\r\nabcdef\r\n--{}--\r\n'.format(boundary))
+
+class FakeS3(BaseHTTPServer.HTTPServer):
+    """Accepts POST uploads, keeping the headers and body of each."""
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), FakeS3Handler)
+        self.requests = []
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def url(self):
+        return 'http://127.0.0.1:{}/'.format(self.server_address[1])
+
+    def stop(self):
+        self.shutdown()
+        self.thread.join()
+        self.server_close()
+
+class FakeS3Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_POST(self):
+        # Like S3, insist on a Content-Length
+        if 'Content-Length' not in self.headers or 'Transfer-Encoding' in self.headers:
+            self.send_response(411)
+            self.end_headers()
+            return
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.headers, body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def check_video_upload(compresslevel, extension, spooled):
+    server = FakeS3()
+    try:
+        file_upload = resource.FileUpload.construct_from({'id': 'file', 'post_url': server.url(), 'post_fields': {'key': 'value'}, 'content_type': 'application/vnd.openai.video+x-compressed'}, 'api_key')
+        with helpers.tempdir() as temp:
+            videos = write_videos(temp, 2, 300000, extension)
+            with mock.patch.object(resource.FileUpload, 'create', return_value=file_upload), \
+                    mock.patch.object(api.tempfile, 'SpooledTemporaryFile', wraps=api.tempfile.SpooledTemporaryFile) as spool:
+                api.upload_training_video(videos, compresslevel=compresslevel)
+            assert spool.called == spooled
+            with open(videos[1][0], 'rb') as f:
+                video = f.read()
+    finally:
+        server.stop()
+
+    [(headers, body)] = server.requests
+    assert int(headers['Content-Length']) == len(body)
+    assert 'Transfer-Encoding' not in headers
+    boundary = headers['Content-Type'].split('boundary=')[1]
+    parts = body.split('--{}'.format(boundary).encode('utf-8'))
+    assert parts[-1] == b'--\r\n'
+    archive = parts[2].split(b'\r\n\r\n', 1)[1][:-2]
+    with tarfile.open(fileobj=io.BytesIO(archive), mode='r:gz') as tar:
+        assert tar.extractfile('video1.{}'.format(extension)).read() == video
+
+def test_upload_training_video_stored():
+    check_video_upload(None, 'mp4', spooled=False)
+    # Streamed whatever the format, since the length must be known
+    check_video_upload(None, 'json', spooled=False)
+
+def test_upload_training_video_compressed():
+    # Only spooled when compression is asked for
+    check_video_upload(6, 'mp4', spooled=True)
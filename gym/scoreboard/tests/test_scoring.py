@@ -0,0 +1,29 @@
+import numpy as np
+
+from gym.scoreboard import scoring
+
+def test_score_batch_matches_score_from_merged():
+    rng = np.random.RandomState(0)
+    trials, reward_threshold = 5, 0.5
+    # Includes an empty run, one shorter than `trials`, and one which never solves
+    runs = [0, 3, 40, 7, 100]
+    lengths, rewards, timestamps = [], [], []
+    for i, count in enumerate(runs):
+        lengths.append(rng.randint(1, 20, size=count))
+        rewards.append(rng.uniform(-1, 0.4 if i == 3 else 1, size=count))
+        timestamps.append(100. * i + np.cumsum(rng.uniform(size=count)))
+    initial_reset_timestamps = [100. * i for i in range(len(runs))]
+
+    batch = scoring.score_batch(
+        np.concatenate(lengths), np.concatenate(rewards), np.concatenate(timestamps),
+        np.cumsum([0] + runs), initial_reset_timestamps, trials, reward_threshold)
+
+    for i in range(len(runs)):
+        expected = scoring.score_from_merged(lengths[i], rewards[i], timestamps[i], initial_reset_timestamps[i], trials, reward_threshold)
+        actual = scoring.batch_score(batch, i)
+        assert sorted(actual) == sorted(expected)
+        for key, value in expected.items():
+            if value is None:
+                assert actual[key] is None, (i, key)
+            else:
+                assert np.isclose(actual[key], value), (i, key, actual[key], value)
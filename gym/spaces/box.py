@@ -1,7 +1,7 @@
 import numpy as np
 
 import gym
-from gym.spaces import prng
+from gym.spaces import codec, prng
 
 class Box(gym.Space):
     """
@@ -11,34 +11,70 @@ class Box(gym.Space):
     Example usage:
     self.action_space = spaces.Box(low=-10, high=10, shape=(1,))
     """
-    def __init__(self, low, high, shape=None):
+    def __init__(self, low, high, shape=None, dtype=np.float64):
         """
         Two kinds of valid input:
             Box(-1.0, 1.0, (3,4)) # low and high are scalars, and shape is provided
             Box(np.array([-1.0,-2.0]), np.array([2.0,4.0])) # low and high are arrays of the same shape
+
+        dtype is the type of the elements of the box, e.g. np.uint8 for
+        images. Scalar bounds are not materialized for the full shape:
+        low and high are then read-only broadcast views, so they can't be
+        modified in place.
         """
+        self.dtype = np.dtype(dtype)
         if shape is None:
             assert low.shape == high.shape
-            self.low = low
-            self.high = high
+            self.low = np.asarray(low, dtype=self.dtype)
+            self.high = np.asarray(high, dtype=self.dtype)
+            self._scalar_bounds = None
         else:
             assert np.isscalar(low) and np.isscalar(high)
-            self.low = low + np.zeros(shape)
-            self.high = high + np.zeros(shape)
+            if np.isscalar(shape):
+                shape = (shape,)
+            low = self.dtype.type(low)
+            high = self.dtype.type(high)
+            # Read-only zero-stride views: one element of storage each
+            self.low = np.broadcast_to(low, shape)
+            self.high = np.broadcast_to(high, shape)
+            self._scalar_bounds = (low, high)
     def sample(self):
-        return prng.np_random.uniform(low=self.low, high=self.high, size=self.low.shape)
+        if self._scalar_bounds is not None:
+            low, high = self._scalar_bounds
+        else:
+            low, high = self.low, self.high
+        if self.dtype.kind in 'iu':
+            sample = prng.np_random.randint(low, high.astype(np.int64) + 1, size=self.shape)
+        else:
+            sample = prng.np_random.uniform(low=low, high=high, size=self.shape)
+        return sample.astype(self.dtype, copy=False)
     def contains(self, x):
-        return x.shape == self.shape and (x >= self.low).all() and (x <= self.high).all()
+        if x.shape != self.shape:
+            return False
+        if self.dtype.kind in 'iu' and x.dtype.kind not in 'biu':
+            # Any integers will do, e.g. int64 arrays built from Python
+            # ints, as long as they're within the bounds
+            return False
+        if self._scalar_bounds is not None:
+            low, high = self._scalar_bounds
+            return x.size == 0 or (x.min() >= low and x.max() <= high)
+        return (x >= self.low).all() and (x <= self.high).all()
 
     def to_jsonable(self, sample_n):
         return np.array(sample_n).tolist()
     def from_jsonable(self, sample_n):
         return [np.asarray(sample) for sample in sample_n]
 
+    def to_binary(self, sample_n, compress=False):
+        return codec.encode_array(np.asarray(sample_n, dtype=self.dtype), compress=compress)
+    def from_binary(self, data):
+        # A list of samples, as from from_jsonable
+        return list(codec.decode_array(data))
+
     @property
     def shape(self):
         return self.low.shape
     def __repr__(self):
         return "Box" + str(self.shape)
     def __eq__(self, other):
-        return np.allclose(self.low, other.low) and np.allclose(self.high, other.high)
+        return self.dtype == other.dtype and np.allclose(self.low, other.low) and np.allclose(self.high, other.high)
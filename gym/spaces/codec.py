@@ -0,0 +1,107 @@
+"""Compact binary encoding for batches of samples.
+
+Every blob starts with a small header: the magic bytes 'GYMB', a kind
+byte and a flags byte. The rest depends on the kind:
+
+- KIND_ARRAY: the dtype string (e.g. '<f8'), the shape, and then the
+  raw little-endian buffer of the array.
+- KIND_TUPLE: the number of parts, followed by each part as a
+  length-prefixed blob.
+- KIND_JSON: a UTF-8 encoded JSON document, used for spaces that don't
+  have a dedicated binary representation.
+
+If FLAG_ZLIB is set, everything after the header is zlib-compressed.
+"""
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from gym import error
+
+MAGIC = b'GYMB'
+
+KIND_JSON = 0
+KIND_ARRAY = 1
+KIND_TUPLE = 2
+
+FLAG_ZLIB = 1
+
+_header = struct.Struct('<4sBB')
+_length = struct.Struct('<Q')
+
+def _pack(kind, body, compress):
+    flags = 0
+    if compress:
+        # Allow passing an explicit zlib level, e.g. compress=1 for speed
+        level = 6 if compress is True else int(compress)
+        body = zlib.compress(body, level)
+        flags |= FLAG_ZLIB
+    return _header.pack(MAGIC, kind, flags) + body
+
+def _unpack(data, expected_kind=None):
+    data = memoryview(data)
+    if len(data) < _header.size:
+        raise error.Error('Binary sample batch is truncated ({} bytes)'.format(len(data)))
+    magic, kind, flags = _header.unpack_from(data)
+    if magic != MAGIC:
+        raise error.Error('Not a binary sample batch: bad magic {!r}'.format(magic))
+    if expected_kind is not None and kind != expected_kind:
+        raise error.Error('Expected binary sample batch of kind {}, not {}'.format(expected_kind, kind))
+    body = data[_header.size:]
+    if flags & FLAG_ZLIB:
+        body = memoryview(zlib.decompress(body))
+    return kind, body
+
+def encode_array(array, compress=False):
+    """Encode an ndarray as a shape/dtype header followed by its raw
+    little-endian buffer."""
+    array = np.asarray(array)
+    if array.dtype.hasobject:
+        raise error.Error('Cannot binary-encode an array with dtype {}'.format(array.dtype))
+    array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    dtype = array.dtype.str.encode('ascii')
+    header = struct.pack('<B', len(dtype)) + dtype + \
+             struct.pack('<B{}Q'.format(array.ndim), array.ndim, *array.shape)
+    return _pack(KIND_ARRAY, header + array.tobytes(), compress)
+
+def decode_array(data):
+    _, body = _unpack(data, KIND_ARRAY)
+    (dtype_len,) = struct.unpack_from('<B', body)
+    offset = 1
+    dtype = np.dtype(body[offset:offset+dtype_len].tobytes().decode('ascii'))
+    offset += dtype_len
+    (ndim,) = struct.unpack_from('<B', body, offset)
+    offset += 1
+    shape = struct.unpack_from('<{}Q'.format(ndim), body, offset)
+    offset += 8 * ndim
+    # Copy so callers get an ordinary writeable array
+    return np.frombuffer(body[offset:], dtype=dtype).reshape(shape).copy()
+
+def encode_tuple(parts, compress=False):
+    """Encode a sequence of blobs (as returned by the other encoders)."""
+    chunks = [struct.pack('<I', len(parts))]
+    for part in parts:
+        chunks.append(_length.pack(len(part)))
+        chunks.append(part)
+    return _pack(KIND_TUPLE, b''.join(chunks), compress)
+
+def decode_tuple(data):
+    _, body = _unpack(data, KIND_TUPLE)
+    (count,) = struct.unpack_from('<I', body)
+    offset = 4
+    parts = []
+    for _ in range(count):
+        (length,) = _length.unpack_from(body, offset)
+        offset += _length.size
+        parts.append(body[offset:offset+length])
+        offset += length
+    return parts
+
+def encode_json(jsonable, compress=False):
+    return _pack(KIND_JSON, json.dumps(jsonable).encode('utf-8'), compress)
+
+def decode_json(data):
+    _, body = _unpack(data, KIND_JSON)
+    return json.loads(body.tobytes().decode('utf-8'))
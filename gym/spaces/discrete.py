@@ -1,7 +1,7 @@
 import numpy as np
 
 import gym, time
-from gym.spaces import prng
+from gym.spaces import codec, prng
 
 class Discrete(gym.Space):
     """
@@ -22,6 +22,10 @@ class Discrete(gym.Space):
         else:
             return False
         return as_int >= 0 and as_int < self.n
+    def to_binary(self, sample_n, compress=False):
+        return codec.encode_array(np.asarray(sample_n, dtype=np.int64), compress=compress)
+    def from_binary(self, data):
+        return codec.decode_array(data).tolist()
     def __repr__(self):
         return "Discrete(%d)" % self.n
     def __eq__(self, other):
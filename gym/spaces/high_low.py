@@ -1,7 +1,7 @@
 import numpy as np
 
 import gym
-from gym.spaces import prng
+from gym.spaces import codec, prng
 
 class HighLow(gym.Space):
     """
@@ -52,6 +52,11 @@ class HighLow(gym.Space):
     def from_jsonable(self, sample_n):
         return [np.asarray(sample) for sample in sample_n]
 
+    def to_binary(self, sample_n, compress=False):
+        return codec.encode_array(np.asarray(sample_n), compress=compress)
+    def from_binary(self, data):
+        return list(codec.decode_array(data))
+
     @property
     def shape(self):
         return self.matrix.shape[0]
@@ -3,7 +3,7 @@ import json # note: ujson fails this test due to float equality
 import numpy as np
 from nose2 import tools
 
-from gym.spaces import Tuple, Box, Discrete, HighLow
+from gym.spaces import Tuple, Box, Discrete, HighLow, codec
 
 @tools.params(Discrete(3),
               Tuple([Discrete(5), Discrete(10)]),
@@ -29,3 +29,59 @@ def test_roundtripping(space):
     s2p = space.to_jsonable([sample_2_prime])
     assert s1 == s1p, "Expected {} to equal {}".format(s1, s1p)
     assert s2 == s2p, "Expected {} to equal {}".format(s2, s2p)
+
+@tools.params(Discrete(3),
+              Tuple([Discrete(5), Discrete(10)]),
+              Tuple([Discrete(5), Box(np.array([0,0]),np.array([1,5]))]),
+              Tuple((Discrete(5), Discrete(2), Discrete(2))),
+              HighLow(np.matrix([[0, 1, 0], [0, 1, 0], [0.0, 100.0, 2]])),
+              Box(0, 255, (210, 160, 3)),
+              )
+def test_binary_roundtripping(space):
+    sample_1 = space.sample()
+    sample_2 = space.sample()
+    for compress in [False, True]:
+        binary_rep = space.to_binary([sample_1, sample_2], compress=compress)
+        sample_1_prime, sample_2_prime = space.from_binary(binary_rep)
+
+        assert space.contains(sample_1_prime)
+        assert space.contains(sample_2_prime)
+        assert space.to_jsonable([sample_1]) == space.to_jsonable([sample_1_prime])
+        assert space.to_jsonable([sample_2]) == space.to_jsonable([sample_2_prime])
+
+def test_box_binary_uses_dtype():
+    space = Box(0, 255, (2, 2), dtype=np.uint8)
+    frames = [[[1, 2], [3, 4]], [[5, 6], [7, 8]]]
+    data = space.to_binary(frames)
+    # One byte per element, not eight
+    assert len(data) == len(codec.encode_array(np.zeros((2, 2, 2), dtype=np.uint8)))
+    samples = space.from_binary(data)
+    assert isinstance(samples, list) and len(samples) == 2
+    assert samples[1].dtype == np.uint8
+    assert samples[1].tolist() == frames[1]
+
+    assert Discrete(3).from_binary(Discrete(3).to_binary([0, 2])) == [0, 2]
+
+def test_box_dtype():
+    space = Box(0, 255, (210, 160, 3), dtype=np.uint8)
+    # Scalar bounds are stored as zero-stride views rather than full arrays
+    assert space.low.strides == (0, 0, 0)
+    assert space.shape == (210, 160, 3)
+
+    sample = space.sample()
+    assert sample.dtype == np.uint8
+    assert space.contains(sample)
+    assert space.contains(np.full((210, 160, 3), 255, dtype=np.uint8))
+    assert not space.contains(np.zeros((210, 160, 3), dtype=np.float64))
+    assert not space.contains(np.zeros((210, 160, 4), dtype=np.uint8))
+
+    # Integer arrays of another dtype are checked against the bounds
+    space = Box(0, 255, (3,), dtype=np.uint8)
+    assert space.contains(np.array([1, 2, 3]))
+    assert not space.contains(np.array([1, 2, 256]))
+    assert not space.contains(np.array([1, 2, -1]))
+
+    space = Box(np.array([-1.0, -2.0]), np.array([2.0, 4.0]), dtype=np.float32)
+    assert space.sample().dtype == np.float32
+    assert space.contains(np.array([0.0, 4.0]))
+    assert not space.contains(np.array([0.0, 4.5]))
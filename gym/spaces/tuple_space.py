@@ -1,4 +1,5 @@
 from gym import Space
+from gym.spaces import codec
 
 class Tuple(Space):
     """
@@ -29,3 +30,12 @@ class Tuple(Space):
 
     def from_jsonable(self, sample_n):
         return zip(*[space.from_jsonable(sample_n[i]) for i, space in enumerate(self.spaces)])
+
+    def to_binary(self, sample_n, compress=False):
+        # Each part is encoded by its own space; compress the whole thing once
+        return codec.encode_tuple([space.to_binary([sample[i] for sample in sample_n])
+                                   for i, space in enumerate(self.spaces)], compress=compress)
+
+    def from_binary(self, data):
+        parts = codec.decode_tuple(data)
+        return list(zip(*[space.from_binary(part) for part, space in zip(parts, self.spaces)]))
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+
+# Modules which 'import gym' should not pull in; they are loaded on
+# first use instead.
+LAZY_MODULES = ['requests', 'distutils', 'pkg_resources', 'gym.scoreboard', 'gym.scoreboard.api']
+
+# Generous, since CI machines vary a lot. Override with
+# GYM_IMPORT_TIME_THRESHOLD (in seconds) to tighten it locally.
+IMPORT_TIME_THRESHOLD = float(os.environ.get('GYM_IMPORT_TIME_THRESHOLD', 2.0))
+
+SCRIPT = '''
+import json, sys, time
+start = time.time()
+import gym
+elapsed = time.time() - start
+print(json.dumps({'elapsed': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+'''
+
+def import_gym():
+    # Use a fresh interpreter, since this one has already imported everything
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT % (LAZY_MODULES,)], stderr=subprocess.STDOUT)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+def test_import_is_lazy():
+    result = import_gym()
+    assert result['modules'] == [], 'import gym eagerly imported: {}'.format(result['modules'])
+
+def test_import_time():
+    # Take the best of a few runs to smooth out disk cache effects
+    elapsed = min(import_gym()['elapsed'] for _ in range(3))
+    assert elapsed < IMPORT_TIME_THRESHOLD, 'import gym took {:.3f}s (threshold {:.3f}s)'.format(elapsed, IMPORT_TIME_THRESHOLD)
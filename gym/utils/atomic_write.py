@@ -1,6 +1,11 @@
 # Based on http://stackoverflow.com/questions/2333872/atomic-writing-to-file-with-python
 
+import atexit
+import collections
+import logging
 import os
+import threading
+import time
 from contextlib import contextmanager
 
 # We would ideally atomically replace any existing file with the new
@@ -29,6 +34,8 @@ else:
     # POSIX rename() is always atomic
     from os import rename as replace
 
+logger = logging.getLogger(__name__)
+
 @contextmanager
 def atomic_write(filepath, binary=False, fsync=False):
     """ Writeable file object that atomically updates a file (using a temporary file). In some cases (namely Python < 3.3 on Windows), this could result in an existing file being temporarily unlinked.
@@ -53,3 +60,142 @@ def atomic_write(filepath, binary=False, fsync=False):
             os.remove(tmppath)
         except (IOError, OSError):
             pass
+
+def fsync_directory(directory):
+    """Make renames into this directory durable. Not all platforms
+    (e.g. Windows) support this, in which case it's a no-op."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except (IOError, OSError):
+        return
+    try:
+        os.fsync(fd)
+    except (IOError, OSError):
+        pass
+    finally:
+        os.close(fd)
+
+class GroupCommitWriter(object):
+    """A queue of atomic writes of whole files, e.g. the manifests and
+    stats snapshots of every monitor in the process, which are committed
+    together in batches.
+
+    write only queues the new contents of a file. Every `interval`
+    seconds a committer thread commits everything queued as one batch,
+    and flush commits whatever is queued straight away, e.g. when a
+    monitor is closed. In a batch:
+
+    - repeated writes to the same path are coalesced, and only the
+      latest contents are written
+    - files are written in the order they were first queued
+    - when any write to a file asks for fsync, the file is fsynced, and
+      each directory is fsynced once, after all the renames
+
+    Until their batch is committed, writes are only in memory, so a
+    crash can lose the last `interval` seconds of them. Errors from
+    background commits are logged, and raised by the next flush.
+
+    With interval=None there is no committer thread, and writes only
+    land on flush.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._cond = threading.Condition(threading.Lock())
+        # path -> (data, binary, fsync)
+        self._pending = collections.OrderedDict()
+        self._committing = False
+        self._errors = []
+        self._thread = None
+        self.batches = 0
+
+    def write(self, path, data, binary=False, fsync=False):
+        """Queue path to be atomically replaced by data: a string, or a
+        function which writes the contents to the file it's given."""
+        with self._cond:
+            if path in self._pending:
+                fsync = fsync or self._pending[path][2]
+            self._pending[path] = (data, binary, fsync)
+            if self.interval is not None and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='gym-group-commit')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def flush(self):
+        """Commit everything queued so far, and wait until it has been.
+        Raises the first error from any commit since the last flush."""
+        self._commit_pending()
+        with self._cond:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            for path, e in self._commit_pending():
+                logger.error('Could not write %s: %s', path, e)
+
+    def _commit_pending(self):
+        with self._cond:
+            # A commit in progress may hold writes queued before ours
+            while self._committing:
+                self._cond.wait()
+            if not self._pending:
+                return []
+            self._committing = True
+            batch, self._pending = self._pending, collections.OrderedDict()
+
+        errors = []
+        try:
+            errors = self._commit(batch)
+        finally:
+            with self._cond:
+                self._committing = False
+                self.batches += 1
+                self._errors.extend(e for _, e in errors)
+                self._cond.notify_all()
+        return errors
+
+    def _commit(self, batch):
+        errors = []
+        directories = set()
+        for path, (data, binary, fsync) in batch.items():
+            try:
+                with atomic_write(path, binary=binary, fsync=fsync) as f:
+                    if callable(data):
+                        data(f)
+                    else:
+                        f.write(data)
+            except Exception as e:
+                errors.append((path, e))
+            else:
+                if fsync:
+                    directories.add(os.path.dirname(os.path.abspath(path)))
+
+        for directory in directories:
+            fsync_directory(directory)
+        return errors
+
+# Queued writes land within this many seconds
+COMMIT_INTERVAL = 1.0
+
+_group_commit_writer = GroupCommitWriter(interval=COMMIT_INTERVAL)
+
+def group_commit_write(path, data, binary=False, fsync=False):
+    """Queue an atomic replacement of path's contents, to be committed
+    within COMMIT_INTERVAL seconds in a batch with every other write
+    queued in the process (see GroupCommitWriter)."""
+    _group_commit_writer.write(path, data, binary=binary, fsync=fsync)
+
+def group_commit_flush():
+    """Commit every queued write now, and wait until it has been."""
+    _group_commit_writer.flush()
+
+def _flush_at_exit():
+    try:
+        group_commit_flush()
+    except Exception as e:
+        logger.error('Could not commit queued writes at exit: %s', e)
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,124 @@
+import collections
+import multiprocessing
+import struct
+import zlib
+from multiprocessing.pool import ThreadPool
+
+class ParallelGzipWriter(object):
+    """A write-only file which gzips what's written to it on several
+    cores.
+
+    Input is split into blocks of `block_size` bytes, and each block is
+    compressed into its own gzip member on a thread pool (zlib releases
+    the GIL). Members are written to `fileobj` in order. A sequence of
+    gzip members is itself a valid gzip stream, readable by gzip,
+    tarfile and friends, at the cost of a few bytes per block.
+
+    With compresslevel=0 blocks are only stored, which is the thing to
+    do for data which is already compressed, e.g. MP4s. The output then
+    has a size known in advance, stored_size(input size, block_size).
+
+    The writer must be closed (which doesn't close `fileobj`) to write
+    out the final block.
+    """
+
+    def __init__(self, fileobj, compresslevel=6, block_size=1 << 20, threads=None):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.block_size = block_size
+        self.threads = threads or multiprocessing.cpu_count()
+        self.closed = False
+
+        self._pool = ThreadPool(self.threads) if self.threads > 1 else None
+        # Compressed members not yet written, in order
+        self._pending = collections.deque()
+        self._buffer = []
+        self._buffered = 0
+        self._blocks = 0
+
+    def write(self, data):
+        # Blocks are cut at exactly block_size bytes, so that stored
+        # output has a predictable size.
+        while len(data) > 0:
+            piece = data[:self.block_size - self._buffered]
+            data = data[len(piece):]
+            self._buffer.append(piece)
+            self._buffered += len(piece)
+            if self._buffered == self.block_size:
+                self._submit()
+
+    def flush(self):
+        pass
+
+    def _submit(self):
+        block = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._blocks += 1
+        if self._pool is None:
+            self.fileobj.write(compress_member(block, self.compresslevel))
+            return
+
+        self._pending.append(self._pool.apply_async(compress_member, (block, self.compresslevel)))
+        # Write out whatever is done, and keep the number of blocks in
+        # memory bounded if the output can't keep up.
+        while self._pending and (self._pending[0].ready() or len(self._pending) > 2 * self.threads):
+            self.fileobj.write(self._pending.popleft().get())
+
+    def close(self):
+        if self.closed:
+            return
+        if self._buffered > 0 or self._blocks == 0:
+            # (An empty member, so empty input is still valid gzip)
+            self._submit()
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().get())
+        self.terminate()
+
+    def terminate(self):
+        """Stop without writing anything more, e.g. after an error."""
+        self.closed = True
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+        self._pending.clear()
+
+# Magic, deflate, no flags, no mtime, no extra flags, unknown OS
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+# Deflate's stored blocks hold at most this many bytes each
+_MAX_STORED_BLOCK = 65535
+
+def compress_member(data, compresslevel=6):
+    """Compress data into a single, complete gzip member."""
+    if compresslevel == 0:
+        return _stored_member(data)
+    # wbits of 16 + MAX_WBITS asks zlib for a gzip header and trailer
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+def _stored_member(data):
+    # Framed by hand rather than by zlib, whose stored block sizes
+    # depend on its internal buffers.
+    parts = [_GZIP_HEADER]
+    offset = 0
+    while True:
+        block = data[offset:offset + _MAX_STORED_BLOCK]
+        offset += len(block)
+        final = offset >= len(data)
+        # BFINAL and BTYPE=00 (stored), padded to a byte, then LEN and NLEN
+        parts.append(struct.pack('<BHH', 1 if final else 0, len(block), len(block) ^ 0xffff))
+        parts.append(block)
+        if final:
+            break
+    parts.append(struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff))
+    return b''.join(parts)
+
+def stored_size(length, block_size=1 << 20):
+    """The size of the output of a ParallelGzipWriter with
+    compresslevel=0, given `length` bytes of input."""
+    sizes = [block_size] * (length // block_size)
+    if length % block_size or not sizes:
+        sizes.append(length % block_size)
+    # Header, trailer, and a 5 byte header per stored block
+    return sum(len(_GZIP_HEADER) + 8 + size + 5 * max(1, -(-size // _MAX_STORED_BLOCK)) for size in sizes)
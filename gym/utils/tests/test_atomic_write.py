@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+
+from gym.utils import atomic_write
+
+def test_group_commit_write():
+    temp = tempfile.mkdtemp()
+    try:
+        writer = atomic_write.GroupCommitWriter()
+        first = os.path.join(temp, 'first')
+        second = os.path.join(temp, 'second')
+        writer.write(first, 'first')
+        for i in range(3):
+            writer.write(second, str(i), fsync=i == 0)
+        # Nothing lands until the batch is committed
+        assert os.listdir(temp) == []
+
+        with mock.patch.object(atomic_write, 'fsync_directory') as fsync_directory:
+            writer.flush()
+        assert writer.batches == 1
+        # The writes were coalesced, and only the last landed...
+        with open(second) as f:
+            assert f.read() == '2'
+        # ...but it's still fsynced, along with its directory, once
+        fsync_directory.assert_called_once_with(os.path.abspath(temp))
+
+        # Nothing to commit
+        writer.flush()
+        assert writer.batches == 1
+    finally:
+        shutil.rmtree(temp)
+
+def test_group_commit_write_function():
+    temp = tempfile.mkdtemp()
+    try:
+        writer = atomic_write.GroupCommitWriter()
+        path = os.path.join(temp, 'file')
+        writer.write(path, lambda f: f.write('written'))
+        writer.flush()
+        with open(path) as f:
+            assert f.read() == 'written'
+    finally:
+        shutil.rmtree(temp)
+
+def test_group_commit_write_interval():
+    temp = tempfile.mkdtemp()
+    try:
+        writer = atomic_write.GroupCommitWriter(interval=0.01)
+        path = os.path.join(temp, 'file')
+        writer.write(path, 'data')
+        deadline = time.time() + 10
+        while not os.path.exists(path):
+            assert time.time() < deadline, 'The committer never wrote the file'
+            time.sleep(0.01)
+    finally:
+        shutil.rmtree(temp)
+
+def test_group_commit_write_error():
+    writer = atomic_write.GroupCommitWriter()
+    writer.write('/nonexistent/directory/file', 'data')
+    try:
+        writer.flush()
+    except (IOError, OSError):
+        pass
+    else:
+        assert False, 'Expected the write to fail'
+    # The writer is still usable afterwards
+    temp = tempfile.mkdtemp()
+    try:
+        writer.write(os.path.join(temp, 'file'), b'data', binary=True)
+        writer.flush()
+        assert os.listdir(temp) == ['file']
+    finally:
+        shutil.rmtree(temp)
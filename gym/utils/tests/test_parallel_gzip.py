@@ -0,0 +1,28 @@
+import gzip
+import io
+import os
+
+from nose2 import tools
+
+from gym.utils import parallel_gzip
+
+@tools.params(
+    (1, 6),
+    (4, 6),
+    (4, 0),
+)
+def test_parallel_gzip(threads, compresslevel):
+    data = os.urandom(50000) + b'abc' * 50000
+    out = io.BytesIO()
+    writer = parallel_gzip.ParallelGzipWriter(out, compresslevel=compresslevel, block_size=10000, threads=threads)
+    for i in range(0, len(data), 3000):
+        writer.write(data[i:i+3000])
+    writer.close()
+    with gzip.GzipFile(fileobj=io.BytesIO(out.getvalue())) as f:
+        assert f.read() == data
+
+def test_parallel_gzip_empty():
+    out = io.BytesIO()
+    parallel_gzip.ParallelGzipWriter(out, threads=2).close()
+    with gzip.GzipFile(fileobj=io.BytesIO(out.getvalue())) as f:
+        assert f.read() == b''